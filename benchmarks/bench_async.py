@@ -0,0 +1,62 @@
+"""
+Wall time of reading several unconnected instruments sequentially and with
+asyncio.gather. Each instrument is the unconnected Comm stand-in with an
+injected round-trip latency.
+
+    $ python benchmarks/bench_async.py
+"""
+import asyncio
+import contextlib
+import io
+import os
+import time
+
+import instrbuilder
+from instrbuilder.async_scpi import AsyncSCPI
+from instrbuilder.instrument_opening import open_by_address
+
+instrument_cmds = os.path.join(os.path.dirname(instrbuilder.__file__), 'instruments')
+LATENCY = 0.02  # seconds per query
+READS = 5  # queries per instrument
+
+
+def open_tester(latency):
+    with contextlib.redirect_stdout(io.StringIO()):
+        instr = open_by_address(addr={'no_interface': 'no_address'}, csv_dir=instrument_cmds,
+                                csv_folder='tester', instr_class='TestInstrument')
+    instr.comm_handle.latency = latency
+    instr.comm_handle.echo = False
+    instr._cmds['time_range']._unconnected_val = '0.1'
+    return instr
+
+
+def sequential(instrs):
+    t = time.perf_counter()
+    for instr in instrs:
+        for _ in range(READS):
+            instr.get('time_range')
+    return time.perf_counter() - t
+
+
+async def concurrent(instrs):
+    async def read(instr):
+        for _ in range(READS):
+            await instr.aget('time_range')
+
+    t = time.perf_counter()
+    await asyncio.gather(*[read(AsyncSCPI(instr)) for instr in instrs])
+    return time.perf_counter() - t
+
+
+def main():
+    print('latency {} s, {} reads per instrument'.format(LATENCY, READS))
+    print('{:>12} {:>14} {:>14}'.format('instruments', 'sequential [s]', 'asyncio [s]'))
+    for count in (1, 2, 4, 8):
+        instrs = [open_tester(LATENCY) for _ in range(count)]
+        t_seq = sequential(instrs)
+        t_async = asyncio.new_event_loop().run_until_complete(concurrent(instrs))
+        print('{:>12} {:>14.3f} {:>14.3f}'.format(count, t_seq, t_async))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+"""
+Benchmark the compiled command templates against str.format for every csv
+in instrbuilder/instruments/
+
+    $ python benchmarks/bench_commands.py
+"""
+import glob
+import os
+import timeit
+
+import instrbuilder
+from instrbuilder.scpi import init_instrument
+
+instrument_cmds = os.path.join(os.path.dirname(instrbuilder.__file__), 'instruments')
+
+
+def load_all():
+    cmds = []
+    for cmd_map in sorted(glob.glob(os.path.join(instrument_cmds, '**', 'commands.csv'),
+                                    recursive=True)):
+        cmd_list, _, _ = init_instrument(cmd_map, addr={'no_interface': 'no_address'},
+                                         lookup=cmd_map.replace('commands.csv', 'lookup.csv'))
+        cmds.extend(cmd_list)
+    return cmds
+
+
+def main(number=2000):
+    cmds = load_all()
+    cases = []
+    for cmd in cmds:
+        configs = dict.fromkeys(cmd.set_config_keys, 1)
+        cases.append((cmd, configs))
+
+    def old():
+        for cmd, configs in cases:
+            cmd.ascii_str.format(value=0.5, **configs)
+            limits = cmd.limits
+            if limits is not None:
+                if (len(limits) == 2) and (type(limits[0]) is not str):
+                    (0.5 >= limits[0]) and (0.5 <= limits[1])
+                else:
+                    0.5 in limits
+
+    def new():
+        for cmd, configs in cases:
+            cmd.format_set(0.5, configs)
+            if cmd.limits is not None:
+                cmd.in_range(0.5)
+
+    for cmd, configs in cases:
+        assert cmd.format_set(0.5, configs) == cmd.ascii_str.format(value=0.5, **configs)
+
+    t_old = min(timeit.repeat(old, number=number, repeat=3))
+    t_new = min(timeit.repeat(new, number=number, repeat=3))
+    per_call = 1e9 / (number * len(cases))
+    print('{} commands'.format(len(cases)))
+    print('str.format : {:8.1f} ns/command'.format(t_old * per_call))
+    print('compiled   : {:8.1f} ns/command'.format(t_new * per_call))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,52 @@
+"""
+Benchmark the ASCII array parsers of convert_return (arr_str, arr_bytes, arr_bytes_floats)
+against the element-by-element parsers they replaced, at 1k, 100k and 1M points
+
+    $ python benchmarks/bench_parsers.py
+"""
+import timeit
+
+import numpy as np
+
+from instrbuilder.scpi import arr_str, arr_bytes, arr_bytes_floats
+
+
+def old_arr_str(str_in):
+    return np.asarray(list(map(lambda x: float(x), str_in.split(','))))
+
+
+def old_arr_bytes(bytes_in):
+    str_in = bytes_in.decode('utf-8').rstrip()
+    return np.asarray(list(map(lambda x: int(x), str_in.split(','))))
+
+
+def old_arr_bytes_floats(bytes_in):
+    str_in = bytes_in.decode('utf-8').rstrip()
+    return np.asarray(list(map(lambda x: float(x), list(filter(None, str_in.split(','))))))
+
+
+def main(sizes=(1000, 100000, 1000000)):
+    rng = np.random.default_rng(0)
+    print('{:>9} {:<18} {:>10} {:>10} {:>8}'.format('points', 'parser', 'old [ms]', 'new [ms]', 'speedup'))
+    for n in sizes:
+        floats = rng.standard_normal(n)
+        ints = rng.integers(-1000, 1000, n)
+        fetch = ','.join('{:+.15E}'.format(v) for v in floats) + '\n'  # 34465A FETC?
+        buffer = (','.join('{:e}'.format(v) for v in floats) + ',\r').encode()  # SR810 TRCA?
+        int_bytes = (','.join(str(v) for v in ints) + '\r').encode()
+        out = np.empty(n)
+        cases = [('arr_str', old_arr_str, arr_str, fetch),
+                 ('arr_str out=', old_arr_str, lambda s: arr_str(s, out=out), fetch),
+                 ('arr_bytes', old_arr_bytes, arr_bytes, int_bytes),
+                 ('arr_bytes_floats', old_arr_bytes_floats, arr_bytes_floats, buffer)]
+        number = max(1, 100000 // n)
+        for name, old, new, data in cases:
+            np.testing.assert_array_equal(old(data), new(data))
+            t_old = min(timeit.repeat(lambda: old(data), number=number, repeat=3)) / number
+            t_new = min(timeit.repeat(lambda: new(data), number=number, repeat=3)) / number
+            print('{:>9} {:<18} {:>10.3f} {:>10.3f} {:>7.1f}x'.format(
+                n, name, t_old * 1e3, t_new * 1e3, t_old / t_new))
+
+
+if __name__ == '__main__':
+    main()
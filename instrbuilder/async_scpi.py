@@ -0,0 +1,95 @@
+'''
+asyncio front end for SCPI instruments. The blocking get/set calls run in a thread pool
+executor so that waits on different instruments (on separate buses) overlap:
+
+    lia = AsyncSCPI(open_by_name('srs_lockin'))
+    dmm = AsyncSCPI(open_by_name('my_multi'))
+    phase, volts = await asyncio.gather(lia.aget('phase'),
+                                        dmm.aget('meas_volt', configs={'ac_dc': 'DC'}))
+'''
+
+# standard library imports
+import asyncio
+import concurrent.futures
+import functools
+
+# thread pool shared by the AsyncSCPI objects; the calls wait on I/O, so there can be
+#   more threads than CPUs (one for each instrument that is busy)
+MAX_WORKERS = 32
+_executor = None
+
+
+def shared_executor():
+    """ the thread pool executor shared by AsyncSCPI objects (created on first use) """
+    global _executor
+    if _executor is None:
+        _executor = concurrent.futures.ThreadPoolExecutor(max_workers=MAX_WORKERS)
+    return _executor
+
+
+class AsyncSCPI(object):
+    """asyncio wrapper of a SCPI instrument.
+
+    Each call holds the lock of the instrument (shared with other wrappers of the instrument
+    and with Rack), so calls to one instrument do not interleave while calls to different
+    instruments run concurrently.
+
+    Parameters
+    ----------
+    instr : SCPI
+        the (blocking) instrument object
+    executor : concurrent.futures.Executor, optional
+        runs the blocking calls; if None the module thread pool (shared_executor) is used
+
+    Attributes
+    ----------
+    instr : SCPI
+        the wrapped instrument; attributes not defined here (e.g. name, help) are passed through
+
+    Methods
+    ----------
+    aget(name, configs={}) :
+        coroutine of SCPI.get
+
+    aset(name, value=None, configs={}) :
+        coroutine of SCPI.set
+
+    aget_many(names, configs=None) :
+        coroutine of SCPI.get_many
+
+    aset_many(settings) :
+        coroutine of SCPI.set_many
+
+    run(func, *args, **kwargs) :
+        run any blocking method of the instrument (e.g. burst_volt) while holding its lock
+
+    """
+
+    def __init__(self, instr, executor=None):
+        self.instr = instr
+        self._executor = executor
+
+    def __getattr__(self, name):
+        return getattr(self.instr, name)
+
+    async def run(self, func, *args, **kwargs):
+        loop = asyncio.get_event_loop()  # the running loop (get_running_loop needs Python 3.7)
+        return await loop.run_in_executor(
+            self._executor or shared_executor(), functools.partial(self._locked, func, args, kwargs))
+
+    def _locked(self, func, args, kwargs):
+        # the lock is taken in the executor thread so the event loop is not blocked
+        with self.instr._io_lock:
+            return func(*args, **kwargs)
+
+    async def aget(self, name, configs={}):
+        return await self.run(self.instr.get, name, configs)
+
+    async def aset(self, name, value=None, configs={}):
+        return await self.run(self.instr.set, name, value, configs)
+
+    async def aget_many(self, names, configs=None):
+        return await self.run(self.instr.get_many, names, configs)
+
+    async def aset_many(self, settings):
+        return await self.run(self.instr.set_many, settings)
@@ -0,0 +1,77 @@
+'''
+The instrbuilder command line tool
+
+    instrbuilder build-cache [csv_directory]   parse and cache every instrument folder
+    instrbuilder clear-cache                   remove the cached definitions
+
+If csv_directory is not given it is read from the configuration file (~/.instrbuilder/config.yaml).
+'''
+
+# standard library imports
+import argparse
+import os
+import sys
+
+# local package imports
+from instrbuilder import definitions
+
+
+def _config_csv_directory(filename):
+    """ csv_directory, cmd_name and lookup_name from the YAML configuration file """
+    import yaml
+    config_file = os.path.join(os.path.expanduser("~"), '.instrbuilder', filename)
+    with open(config_file, 'r') as yaml_config:
+        configs = yaml.safe_load(yaml_config)
+    return (configs['csv_directory'], configs.get('cmd_name', 'commands.csv'),
+            configs.get('lookup_name', 'lookup.csv'))
+
+
+def build_cache(args):
+    if args.csv_directory is None:
+        try:
+            csv_directory, cmd_name, lookup_name = _config_csv_directory(args.config)
+        except (OSError, KeyError, TypeError) as e:
+            print('Error: no csv_directory given and the configuration file could not be read ({})'.format(e))
+            return 1
+    else:
+        csv_directory, cmd_name, lookup_name = args.csv_directory, args.cmd_name, args.lookup_name
+
+    built = definitions.build_cache(csv_directory, cmd_name, lookup_name)
+    for folder, num_cmds in built.items():
+        print('  {:<40} {:>5} commands'.format(folder, num_cmds))
+    print('Cached {} instrument definitions from {} in {}'.format(
+        len(built), csv_directory, definitions.cache_dir))
+    return 0
+
+
+def clear_cache(args):
+    print('Removed {} cached definitions from {}'.format(
+        definitions.clear_cache(), definitions.cache_dir))
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='instrbuilder', description='instrbuilder utilities')
+    subparsers = parser.add_subparsers(dest='command')
+
+    build = subparsers.add_parser('build-cache',
+                                  help='parse and cache the definitions of every instrument folder')
+    build.add_argument('csv_directory', nargs='?', default=None,
+                       help='base directory of the instrument folders (default: from the configuration file)')
+    build.add_argument('--config', default='config.yaml', help='the YAML configuration filename')
+    build.add_argument('--cmd-name', default='commands.csv', help='the name of the commands csv files')
+    build.add_argument('--lookup-name', default='lookup.csv', help='the name of the lookup csv files')
+    build.set_defaults(func=build_cache)
+
+    clear = subparsers.add_parser('clear-cache', help='remove the cached definitions')
+    clear.set_defaults(func=clear_cache)
+
+    args = parser.parse_args(argv)
+    if args.command is None:
+        parser.print_help()
+        return 1
+    return args.func(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
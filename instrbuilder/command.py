@@ -5,6 +5,193 @@
 
 # standard library imports
 import re
+import string
+import threading
+from collections.abc import Mapping, MutableMapping
+
+
+def _parse_template(template):
+    """ split a str.format template into literal text and field names.
+        Returns None if the template has format specs, conversions, positional or attribute fields.
+    """
+    if not isinstance(template, str):
+        return None
+    try:
+        parsed = list(string.Formatter().parse(template))
+    except ValueError:
+        # malformed template, str.format raises the same error when called
+        return None
+
+    literals = []
+    keys = []
+    for literal, field, spec, conversion in parsed:
+        literals.append(literal)
+        if field is None:
+            continue
+        if spec or conversion or not field.isidentifier():
+            return None
+        keys.append(field)
+    return literals, keys
+
+
+def compile_template(template):
+    """
+    Compile a getter template (e.g. 'OUTP? {chan}') into a function of a configs dictionary.
+
+    Parameters
+    ----------
+    template : str
+        the ASCII command string with {key} fields
+
+    Returns
+    -------
+    function
+        fmt(configs) that returns the same string as template.format(**configs)
+    """
+    parsed = _parse_template(template)
+    if parsed is not None and len(parsed[1]) == 0:
+        # no fields: the string is fixed ('{{' escapes are resolved by the parse)
+        fixed = ''.join(parsed[0])
+        return lambda configs: fixed
+    return lambda configs: template.format(**configs)
+
+
+def compile_setter(template):
+    """
+    Compile a setter template (e.g. 'PHAS {value}') into a function of the value and a configs dictionary.
+
+    Parameters
+    ----------
+    template : str
+        the ASCII command string with a {value} field and optional {key} fields
+
+    Returns
+    -------
+    function
+        fmt(value, configs) that returns the same string as template.format(value=value, **configs)
+    """
+    parsed = _parse_template(template)
+    if parsed is not None and parsed[1] == ['value']:
+        # the common case: a header and the value
+        literals = parsed[0]
+        prefix = literals[0]
+        suffix = ''.join(literals[1:])
+        return lambda value, configs: prefix + format(value, '') + suffix
+    return lambda value, configs: template.format(value=value, **configs)
+
+
+def _check_limits_generic(limits, value):
+    """ range check as written in SCPI.check_set_range; used for limits of unusual form """
+    if (len(limits) == 2) and (type(limits[0]) is not str):
+        return (value >= limits[0]) and (value <= limits[1])
+    else:
+        return value in limits
+
+
+def compile_limits(limits):
+    """
+    Build the validator for the allowed range of a setter.
+
+    Parameters
+    ----------
+    limits : list or None
+        [min, max] for numeric limits or a list of allowed values
+
+    Returns
+    -------
+    function
+        in_range(value) that returns True if the value is allowed. It reads the limits list
+        when called, so a change in place (e.g. cmd.limits[1] = 5) is seen
+    """
+    if limits is None:
+        return lambda value: True
+    try:
+        num_limits = len(limits)
+    except TypeError:
+        return lambda value: _check_limits_generic(limits, value)
+
+    if (num_limits == 2) and (type(limits[0]) is not str):
+        return lambda value: (value >= limits[0]) and (value <= limits[1])
+    else:
+        return lambda value: value in limits
+
+def lookup_key(key):
+    """ normalize a lookup key the way init_instrument reads the lookup csv:
+        a string that is a number becomes a float (so 1, 1.0 and '1' are the same key)
+    """
+    if isinstance(key, str):
+        try:
+            num = float(key)
+        except ValueError:
+            return key
+        if num == num:  # nan never matches itself, keep the string
+            return num
+    return key
+
+
+class Lookup(Mapping):
+    """
+    An immutable two-way lookup table between human-readable names and the
+    values that are sent to and received from the instrument.
+
+    Indexing by name (``lookup['EITHER']``) returns the instrument value; :meth:`name`
+    maps an instrument value back to its name. Keys and values are normalized with
+    :func:`lookup_key` so both directions are dictionary (hash) lookups.
+
+    Parameters
+    ----------
+    table : dict, optional
+        The keys are the human-readable names, the values are the instrument values.
+        E.g. `{'SLOW': 0, 'FAST': 1}`
+    """
+
+    def __init__(self, table=None):
+        forward = {}
+        names = {}
+        for name, value in dict(table or {}).items():
+            forward[lookup_key(name)] = value
+            names.setdefault(lookup_key(value), []).append(lookup_key(name))
+        self._forward = forward
+        # several names may map to one value; the first in the table is returned by name()
+        self._names = {value: tuple(n) for value, n in names.items()}
+
+    def __getitem__(self, name):
+        try:
+            return self._forward[name]
+        except KeyError:
+            return self._forward[lookup_key(name)]
+
+    def __contains__(self, name):
+        try:
+            return name in self._forward or lookup_key(name) in self._forward
+        except TypeError:  # unhashable, e.g. an array
+            return False
+
+    def __iter__(self):
+        return iter(self._forward)
+
+    def __len__(self):
+        return len(self._forward)
+
+    def __repr__(self):
+        return repr(self._forward)
+
+    def name(self, value):
+        """ the (first) name for an instrument value; raises KeyError if the value is not in the table """
+        try:
+            if value in self._names:
+                return self._names[value][0]
+            return self._names[lookup_key(value)][0]
+        except TypeError:  # unhashable, e.g. an array
+            raise KeyError(value)
+
+    def names(self, value):
+        """ all names that map to an instrument value (empty if none) """
+        try:
+            return self._names.get(lookup_key(value), ())
+        except TypeError:
+            return ()
+
 
 class Command(object):
     """
@@ -53,7 +240,7 @@ class Command(object):
         A lookup table for values that can be mapped to more human-readable results. 
         E.g. lookup = `{'SLOW': 0, 'FAST': 1}`
         The keys are the human-readable names, the dictionary values are what is sent and 
-        received from the instrument. 
+        received from the instrument. Stored as an immutable two-way :class:`Lookup`.
     is_config : bool, optional
         is a "configuration" variable that should be measured and logged at the start 
         and end of an experiment.
@@ -86,6 +273,8 @@ class Command(object):
 
         self.name = name
 
+        # the setter and getter strings are compiled into format functions when assigned
+        #   (see the ascii_str and ascii_str_get properties)
         ascii_str = ascii_str.rstrip()
         if ascii_str.find('{value}') == -1:
             # command that is sent over scpi
@@ -113,11 +302,16 @@ class Command(object):
         # getter_type: a function that converts the value retrieved to the anticipated type,
         # typically a built-in like float, int, etc. but could be a custom function
         self.getter_type = getter_type
+        # the response of a binary getter is read as raw bytes (see SCPI._query)
+        self.binary_get = bool(getattr(getter_type, 'binary', False))
         self.setter = setter  # is this a setter? True or False
         self.setter_type = setter_type  # TODO: checks that the value matches this type
 
-        # lookup table support (dictionary)
+        # lookup table support (two-way, name <-> instrument value)
+        if not isinstance(lookup, Lookup):
+            lookup = Lookup(lookup)
         self.lookup = lookup
+        self.has_lookup = len(lookup) > 0  # a Lookup does not change
 
         # we want to store the acceptable range as the value -- if its lookups convert it
         if limits is not None:
@@ -125,7 +319,7 @@ class Command(object):
                 for idx, s in enumerate(limits):
                     limits[idx] = lookup[s]
 
-        self.limits = limits
+        self.limits = limits  # compiled into a validator, see in_range
 
         self.doc = doc
         self.subsystem = subsystem
@@ -137,6 +331,112 @@ class Command(object):
         self.setter_override = setter_override
         self.returns_image = returns_image
 
+    @property
+    def ascii_str(self):
+        return self._ascii_str
+
+    @ascii_str.setter
+    def ascii_str(self, ascii_str):
+        self._ascii_str = ascii_str
+        # format_set(value, configs): the string sent to the instrument on set;
+        #   same as ascii_str.format(value=value, **configs)
+        self.format_set = compile_setter(ascii_str)
+
+    @property
+    def ascii_str_get(self):
+        return self._ascii_str_get
+
+    @ascii_str_get.setter
+    def ascii_str_get(self, ascii_str_get):
+        self._ascii_str_get = ascii_str_get
+        # format_get(configs): the string sent to the instrument on get; same as ascii_str_get.format(**configs)
+        self.format_get = compile_template(ascii_str_get)
+
+    @property
+    def limits(self):
+        return self._limits
+
+    @limits.setter
+    def limits(self, limits):
+        self._limits = limits
+        self.in_range = compile_limits(limits)
+
+
+class CommandTable(MutableMapping):
+    """
+    A dictionary of commands (by name) that builds each Command on first access.
+
+    Instrument definitions have hundreds of commands while a script uses a few; the rows
+    are kept as tuples and a row is turned into a Command (with its compiled format functions
+    and config keys) the first time it is looked up. Iterating, len and ``in`` do not build
+    commands. Commands that are assigned (table[name] = cmd) are stored as is.
+    Threads may share a table: each command is built once.
+
+    Parameters
+    ----------
+    rows : list (of dict)
+        Command keyword arguments, one dictionary per command (each with the same keys)
+    factory : function, optional
+        builds the Command from a dictionary of keyword arguments. Defaults to Command(**row)
+    """
+
+    def __init__(self, rows=(), factory=None):
+        rows = list(rows)
+        self._fields = tuple(rows[0]) if rows else ()
+        self._rows = {row['name']: tuple(row[f] for f in self._fields) for row in rows}
+        self._factory = factory or (lambda row: Command(**row))
+        self._cmds = {}
+        # the order of the definition file (commands that are added later go at the end)
+        self._order = dict.fromkeys(self._rows)
+        self._lock = threading.Lock()
+
+    def __getitem__(self, name):
+        try:
+            return self._cmds[name]
+        except KeyError:
+            pass
+        with self._lock:
+            try:
+                return self._cmds[name]  # built by another thread
+            except KeyError:
+                pass
+            row = self._rows[name]  # KeyError if not a command
+            # the row is kept if the factory raises
+            cmd = self._cmds[name] = self._factory(dict(zip(self._fields, row)))
+            del self._rows[name]
+        return cmd
+
+    def __setitem__(self, name, cmd):
+        with self._lock:
+            self._rows.pop(name, None)
+            self._cmds[name] = cmd
+            self._order[name] = None
+
+    def __delitem__(self, name):
+        with self._lock:
+            if self._rows.pop(name, None) is None:
+                del self._cmds[name]
+            else:
+                self._cmds.pop(name, None)
+            del self._order[name]
+
+    def __contains__(self, name):
+        return name in self._order
+
+    def __iter__(self):
+        return iter(self._order)
+
+    def __len__(self):
+        return len(self._order)
+
+    def __repr__(self):
+        return '<CommandTable: {} commands, {} built>'.format(len(self), len(self._cmds))
+
+    @property
+    def built(self):
+        """ names of the commands that have been built """
+        return list(self._cmds)
+
 
 class Register(object):
 
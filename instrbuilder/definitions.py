@@ -0,0 +1,365 @@
+'''
+Reads the instrument definitions (the commands CSV and lookup CSV files) into a list of rows,
+one dictionary of Command keyword arguments per command. The getter and setter types are
+kept by their name in scpi.convert_return so that the rows can be stored. The CSV files are
+read with the csv module (read_csv gives the same values as pandas.read_csv) so pandas is not needed.
+
+Parsed definitions are cached on disk (in ~/.instrbuilder/cache) keyed by the CSV file paths.
+Each cache file records a hash of the CSV contents, so an edited CSV is re-parsed
+automatically. Build the cache for every instrument folder with:
+
+    instrbuilder build-cache
+'''
+
+# standard library imports
+import os
+import math
+import ast
+import csv
+import hashlib
+import pickle
+
+# bump when the form of the cached rows changes
+CACHE_VERSION = 2
+cache_dir = os.path.join(os.path.expanduser("~"), '.instrbuilder', 'cache')
+# definitions already loaded by this process: {(cmd_map, lookup): (file signatures, rows)}
+_loaded = {}
+
+
+# cells that pandas.read_csv reads as NaN (its default na_values)
+NA_VALUES = frozenset(['', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan',
+                       '1.#IND', '1.#QNAN', '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a',
+                       'nan', 'null'])
+TRUE_VALUES = ('True', 'TRUE', 'true')
+FALSE_VALUES = ('False', 'FALSE', 'false')
+
+
+def _convert_all(values, func):
+    """ [func(v) for v in values], or None if any value does not convert """
+    converted = []
+    for v in values:
+        if '_' in v:
+            # python numbers accept 1_000; pandas does not
+            return None
+        try:
+            converted.append(func(v))
+        except ValueError:
+            return None
+    return converted
+
+
+def _convert_column(cells):
+    """ convert the str cells of a column with the type inference of pandas.read_csv:
+        int if every cell is an integer, float if every cell is a number (or NaN), bool if
+        every cell is True/False (with NaN mixed in as in pandas' object columns), otherwise str.
+        NA cells are float NaN.
+    """
+    na = [c in NA_VALUES for c in cells]
+    values = [c for c, is_na in zip(cells, na) if not is_na]
+
+    converted = None
+    if not any(na):
+        converted = _convert_all(values, int)
+    if converted is None:
+        converted = _convert_all(values, float)
+    if converted is None and all(v in TRUE_VALUES or v in FALSE_VALUES for v in values):
+        converted = [v in TRUE_VALUES for v in values]
+    if converted is None:
+        converted = values
+
+    converted = iter(converted)
+    return [math.nan if is_na else next(converted) for is_na in na]
+
+
+def read_csv(filename):
+    """
+    read a CSV file into a list of rows (dictionaries keyed by column name) with the same values
+    as pandas.read_csv: the column types are inferred, empty (and NA) cells are NaN.
+    Column names are stripped of white space and blank lines are skipped.
+
+    Parameters
+    ----------
+    filename : str
+        the CSV file
+
+    Returns
+    ----------
+    list (of dict)
+    """
+    with open(filename, 'r', newline='', encoding='utf-8-sig') as fp:
+        reader = csv.reader(fp)
+        header = [h.strip() for h in next(reader)]
+        lines = [line for line in reader if line]
+
+    num_cols = len(header)
+    # short lines are filled with empty cells
+    lines = [(line + [''] * num_cols)[:num_cols] for line in lines]
+    columns = [_convert_column(col) for col in zip(*lines)] if lines else [[]] * num_cols
+    return [dict(zip(header, values)) for values in zip(*columns)]
+
+
+def _is_na(value):
+    return isinstance(value, float) and math.isnan(value)
+
+
+def read_definitions(cmd_map, lookup=None):
+    """
+    parse the CSV file of commands (and lookups) into rows of Command keyword arguments
+
+    Parameters
+    ----------
+    cmd_map : str
+        path to the CSV file of instrument commands
+    lookup : str, optional
+        filename of the CSV file of lookup table
+
+    Returns
+    ----------
+    list (of dict)
+        Command keyword arguments; getter_type and setter_type are names (keys of convert_return)
+    """
+
+    # Read CSV file of commands
+    df = read_csv(cmd_map)
+    # strip white space and end-of-line from string inputs
+    for row in df:
+        for gs_type in ['setter_type', 'getter_type']:
+            if isinstance(row[gs_type], str):
+                row[gs_type] = row[gs_type].strip()
+
+    # Read CSV file of lookups
+    cmd_lookups = {}
+    if lookup:
+        df_look = read_csv(lookup)
+
+        # make a dictionary for each command
+        for index, row in enumerate(df_look):
+            # skip empty rows (for example, at the end)
+            if all(_is_na(v) for v in row.values()):
+                continue
+            if index == 0:
+                try:
+                    if math.isnan(row['command']):
+                        raise Exception(
+                            'The first element of the lookup table is empty')
+                except Exception as inst:
+                    pass
+            try:
+                if not math.isnan(row['command']):
+                    current_cmd = current_cmd  # shouldn't get here
+            except Exception as inst:
+                current_cmd = row['command']
+
+            try:
+                dict_key = float(row['name'])
+            except ValueError:
+                dict_key = str(row['name'])
+
+            if current_cmd in cmd_lookups.keys():
+                cmd_lookups[current_cmd][dict_key] = row['value']
+            else:
+                # initialize the dictionary
+                cmd_lookups[current_cmd] = {}
+                cmd_lookups[current_cmd][dict_key] = row['value']
+
+    rows = []
+    for row in df:
+        # convert getter, setter to Boolean True or False
+        for gs in ['getter', 'setter']:
+            if row[gs] in ['True', 'T', 'TRUE', 'true', True]:
+                tmp = True
+            elif row[gs] in ['False', 'F', 'FALSE', 'false', False]:
+                tmp = False
+            else:
+                tmp = False
+            row[gs] = tmp  # converts to Boolean
+
+        if row['setter_range'] is not None:
+            try:
+                row['setter_range'] = ast.literal_eval(row['setter_range'])
+            except ValueError:
+                if not math.isnan(row["setter_range"]):
+                    import colorama
+                    print(
+                        f'Warning setter_range of {colorama.Fore.GREEN}{row["setter_range"]}{colorama.Style.RESET_ALL} for command {colorama.Fore.BLUE}{row["name"]}{colorama.Style.RESET_ALL} not of proper form'
+                    )
+                row['setter_range'] = None
+
+        # the default (empty cell) value is nan. Convert to None or 0 depending upon column
+        def modify_default(row_el, default_value):
+            try:
+                row_el = default_value if math.isnan(row_el) else row_el
+            except TypeError:
+                row_el = row_el
+            return row_el
+
+        row['setter_inputs'] = modify_default(row['setter_inputs'], 1)
+        row['getter_inputs'] = modify_default(row['getter_inputs'], 0)
+        row['ascii_str_get'] = modify_default(row['ascii_str_get'], None)
+        row['subsystem'] = modify_default(row['subsystem'], None)
+
+        rows.append(dict(
+            name=row['name'],
+            ascii_str=row['ascii_str'],
+            ascii_str_get=row['ascii_str_get'],
+            getter=row['getter'],
+            getter_type=row['getter_type'],
+            setter=row['setter'],
+            setter_type=row['setter_type'],
+            limits=row['setter_range'],
+            doc=row['doc'],
+            subsystem=row['subsystem'],
+            getter_inputs=row['getter_inputs'],
+            setter_inputs=row['setter_inputs'],
+            lookup=cmd_lookups.get(row['name'], {}),
+            is_config=row['is_config']))
+
+    return rows
+
+
+def _files_hash(files):
+    """ sha1 of the contents of the files (a missing file hashes as empty) """
+    h = hashlib.sha1()
+    for f in files:
+        h.update(b'\0')
+        if f and os.path.isfile(f):
+            with open(f, 'rb') as fp:
+                h.update(fp.read())
+    return h.hexdigest()
+
+
+def cache_filename(cmd_map, lookup=None):
+    """ the cache file for a commands (and lookup) CSV; named by a hash of the absolute paths """
+    key = '\0'.join(os.path.abspath(f) if f else '' for f in (cmd_map, lookup))
+    return os.path.join(cache_dir, hashlib.sha1(key.encode()).hexdigest() + '.pickle')
+
+
+def _signature(files):
+    """ (modification time, size) of each file; None for a missing file """
+    sig = []
+    for f in files:
+        try:
+            st = os.stat(f)
+            sig.append((st.st_mtime_ns, st.st_size))
+        except (OSError, TypeError):
+            sig.append(None)
+    return tuple(sig)
+
+
+def load_definitions(cmd_map, lookup=None, use_cache=True):
+    """
+    rows of Command keyword arguments from the on-disk cache, parsing the CSV files
+    (and updating the cache) if the cache is missing or the CSV contents have changed.
+
+    Definitions are also kept in memory, so instruments of the same model share one list of
+    rows (which must not be modified) until the CSV files change.
+
+    Parameters
+    ----------
+    cmd_map : str
+        path to the CSV file of instrument commands
+    lookup : str, optional
+        filename of the CSV file of lookup table
+    use_cache : bool, optional
+        if False always parse the CSV files and do not write the cache
+
+    Returns
+    ----------
+    list (of dict)
+        see read_definitions
+    """
+    if not use_cache:
+        return read_definitions(cmd_map, lookup)
+
+    key = (os.path.abspath(cmd_map), os.path.abspath(lookup) if lookup else None)
+    sig = _signature(key)
+    try:
+        loaded_sig, rows = _loaded[key]
+        if loaded_sig == sig:
+            return rows
+    except KeyError:
+        pass
+    rows = _load_cached(cmd_map, lookup)
+    _loaded[key] = (sig, rows)
+    return rows
+
+
+def _load_cached(cmd_map, lookup):
+    """ rows from the on-disk cache, or parsed (and written to the cache) if it is stale """
+    contents_hash = _files_hash((cmd_map, lookup))
+    filename = cache_filename(cmd_map, lookup)
+    try:
+        with open(filename, 'rb') as fp:
+            cached = pickle.load(fp)
+        if cached['version'] == CACHE_VERSION and cached['hash'] == contents_hash:
+            return cached['rows']
+    except Exception:
+        # missing, stale or unreadable cache
+        pass
+
+    rows = read_definitions(cmd_map, lookup)
+    _write_cache(filename, {'version': CACHE_VERSION, 'hash': contents_hash,
+                            'cmd_map': cmd_map, 'lookup': lookup, 'rows': rows})
+    return rows
+
+
+def _write_cache(filename, cached):
+    """ write to a temporary file (unique to this writer) and rename over the cache file, so
+    processes building the cache at the same time never read a partial file """
+    import tempfile
+    tmp_name = None
+    try:
+        os.makedirs(os.path.dirname(filename), exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=os.path.dirname(filename), suffix='.tmp')
+        with os.fdopen(fd, 'wb') as fp:
+            pickle.dump(cached, fp, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_name, filename)
+    except Exception as e:
+        print('Warning: could not write the definition cache {}: {}'.format(filename, e))
+        if tmp_name is not None and os.path.exists(tmp_name):
+            os.remove(tmp_name)
+
+
+def build_cache(csv_directory, cmd_name='commands.csv', lookup_name='lookup.csv'):
+    """
+    parse (and cache) the definitions of every instrument folder under csv_directory
+
+    Parameters
+    ----------
+    csv_directory : str
+        base directory of the instrument folders
+    cmd_name : str, optional
+        the name of the csv file with commands
+    lookup_name : str, optional
+        the name of the csv file with a lookup map
+
+    Returns
+    ----------
+    dict
+        {folder (relative to csv_directory): number of commands}
+    """
+    built = {}
+    for dirpath, dirnames, filenames in sorted(os.walk(csv_directory)):
+        dirnames.sort()
+        if cmd_name not in filenames:
+            continue
+        lookup = os.path.join(dirpath, lookup_name) if lookup_name in filenames else None
+        try:
+            rows = _load_cached(os.path.join(dirpath, cmd_name), lookup)
+        except Exception as e:
+            print('Warning: could not parse {}: {}'.format(dirpath, e))
+            continue
+        built[os.path.relpath(dirpath, csv_directory)] = len(rows)
+    return built
+
+
+def clear_cache():
+    """ remove all cached definitions; returns the number of files removed """
+    _loaded.clear()
+    removed = 0
+    if os.path.isdir(cache_dir):
+        for f in os.listdir(cache_dir):
+            if f.endswith('.pickle'):
+                os.remove(os.path.join(cache_dir, f))
+                removed += 1
+    return removed
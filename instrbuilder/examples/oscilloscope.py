@@ -22,6 +22,9 @@ if KEYSIGHT:
 	# save a PNG screen-shot to host computer
 	t = osc.save_display_data('test')
 
+	# download the trace of channel 1 (binary, 16 bit) as time and voltage arrays
+	t, v = osc.get_waveform(chan=1, fmt='WORD')
+
 if RIGOL:
 	# rigol_ds is the name in my YAML file
 	osc = open_by_name(name='rigol_ds')
@@ -54,6 +57,10 @@ if RIGOL:
 	# general measure -- input measure type
 	vavg = osc.get('meas', configs={'meas_type':'VAVG', 'chan':1}) 
 
+	# both measures with one (compound) query
+	vp, vavg = osc.get_many(['meas_vpp', 'meas'],
+	                        configs=[{'chan':1}, {'meas_type':'VAVG', 'chan':1}])
+
 	print('Measured pk-pk voltage of = {}'.format(vp))
 	print('Measured avg voltage of = {}'.format(vavg))
 
@@ -7,6 +7,7 @@
 import warnings
 import time
 import sys
+import threading
 import math
 import ast
 from collections import defaultdict
@@ -65,6 +66,7 @@ class IC(object):
                  name='not_named',
                  slave_address=None,
                  unconnected=False):
+        self._io_lock = threading.Lock()  # see SCPI
         self._cmds = {}
         for reg in reg_list:
             self._cmds[reg.name] = reg  # maintain cmds for compatibility with upper-layers (ophyd)
@@ -3,13 +3,17 @@
 # koerner.lucas@stthomas.edu
 # University of St. Thomas
 
-import pyvisa as visa
-import oyaml as yaml  # oyaml preserves ordering (installed oyaml)
 import os
 import sys
+import copy
+import json
+import time
 import inspect
+import threading
+import collections
+import concurrent.futures
 
-from instrbuilder.scpi import init_instrument
+from instrbuilder.scpi import init_instrument, resource_manager, list_resources
 from instrbuilder import instruments
 
 home = os.path.join(os.path.expanduser("~"), '.instrbuilder')
@@ -17,18 +21,87 @@ home = os.path.join(os.path.expanduser("~"), '.instrbuilder')
 INSTR_PREFIXES = ["GPIB", "PXI", "TCPIP", "USB", "VXI"]
 
 
-def find_visa_connected():
+class ConfigRegistry(object):
+    """The YAML configuration files of this process. A file is parsed once and parsed again
+    only when its modification time (or size) changes.
+
+    Parameters
+    ----------
+    directory : str, optional
+        directory of the configuration files; defaults to ~/.instrbuilder
+
+    Methods
+    ----------
+    load(filename='config.yaml') :
+        the configuration dictionary (shared: copy it before making changes)
+
+    save(configs, filename='config.yaml') :
+        write the configuration dictionary to the YAML file
+
+    invalidate(filename=None) :
+        forget a parsed file (or all files)
+
+    """
+
+    def __init__(self, directory=None):
+        self.directory = directory
+        self._configs = {}
+        self._lock = threading.Lock()
+
+    def path(self, filename):
+        return os.path.join(self.directory or home, filename)
+
+    def load(self, filename='config.yaml'):
+        path = self.path(filename)
+        st = os.stat(path)  # OSError if there is no configuration file
+        signature = (st.st_mtime_ns, st.st_size)
+        with self._lock:
+            cached = self._configs.get(path)
+            if cached is not None and cached[0] == signature:
+                return cached[1]
+            import oyaml as yaml  # oyaml preserves ordering (installed oyaml)
+            with open(path, 'r') as yaml_config:
+                configs = yaml.safe_load(yaml_config)
+            self._configs[path] = (signature, configs)
+            return configs
+
+    def save(self, configs, filename='config.yaml'):
+        import oyaml as yaml
+        path = self.path(filename)
+        with self._lock:
+            self._configs.pop(path, None)
+            with open(path, 'w+') as f:
+                # see: https://pyyaml.org/wiki/PyYAMLDocumentation (for default_flow_style)
+                yaml.dump(configs, f, default_flow_style=False)
+
+    def invalidate(self, filename=None):
+        with self._lock:
+            if filename is None:
+                self._configs.clear()
+            else:
+                self._configs.pop(self.path(filename), None)
+
+
+# the registry used by the functions of this module
+config_registry = ConfigRegistry()
+
+
+def find_visa_connected(ttl=0):
     """
     Finds VISA connected devices, returns the connected resources as a list
 
+    Parameters
+    ----------
+    ttl : float, optional
+        reuse a listing of the resources made less than ttl seconds ago (see scpi.list_resources);
+        the default enumerates the bus
+
     Returns
     -------
     tuple
         Tuple of the connected resources (by address)
     """
-
-    mgr = visa.ResourceManager()
-    resources = mgr.list_resources()
+    resources = list_resources(ttl=ttl)
     print('Found VISA devices: ')
     for d in resources:
         if any([d.startswith(prefix) for prefix in INSTR_PREFIXES]):
@@ -70,9 +143,7 @@ def init_yaml(csv_dir = '/Users/koer2434/Google Drive/UST/research/instrbuilder/
         pass
 
     # write to YAML file
-    with open(os.path.join(home, filename), 'w+') as f:
-        # see: https://pyyaml.org/wiki/PyYAMLDocumentation (for default_flow_style)
-        yaml.dump(configs, f, default_flow_style=False)
+    config_registry.save(configs, filename)
     return
 
 def user_input(address, interface=None, name=None, filename='config.yaml'):
@@ -92,9 +163,7 @@ def user_input(address, interface=None, name=None, filename='config.yaml'):
         The configuration dictionary that will be used to append the YAML
     """
     # read current YAML
-    current_configs = None
-    with open(os.path.join(home, filename), 'r+') as yaml_config:
-        current_configs = yaml.safe_load(yaml_config)
+    current_configs = config_registry.load(filename)
 
     ok = False
     if name is None:
@@ -154,10 +223,8 @@ def append_to_yaml(new_configs, filename='config.yaml'):
     None
 
     """
-    # read current YAML
-    configs = None
-    with open(os.path.join(home, filename), 'r+') as yaml_config:
-        configs = yaml.safe_load(yaml_config)
+    # read current YAML (a copy, since the registry's dictionary is shared)
+    configs = copy.deepcopy(config_registry.load(filename))
 
     if 'instruments' in new_configs.keys():
         print('Error: instruments key is in the new configuration dictionary')
@@ -169,17 +236,168 @@ def append_to_yaml(new_configs, filename='config.yaml'):
     configs['instruments'].update(new_configs)
 
     # write to YAML file
-    with open(os.path.join(home, filename), 'w+') as f:
-        # see: https://pyyaml.org/wiki/PyYAMLDocumentation (for default_flow_style)
-        yaml.dump(configs, f, default_flow_style=False)
+    config_registry.save(configs, filename)
     return
 
 
-def detect_instruments(filename='config.yaml'):
+# result of discover_instruments for each address
+#   idn is None if the probe failed; config_name is the name in the configuration file (or None)
+Discovered = collections.namedtuple('Discovered', ['address', 'idn', 'latency', 'config_name', 'cached'])
+
+IDN_CACHE = 'idn_cache.json'  # within home
+
+
+def _config_names(configs):
+    """ {address: name} of the instruments in the configuration dictionary """
+    names = {}
+    try:
+        for name, instr in configs['instruments'].items():
+            names[list(instr['address'].values())[0]] = name
+    except (KeyError, AttributeError, IndexError, TypeError):
+        pass
+    return names
+
+
+def _read_idn_cache():
+    """ {address: {'idn', 'latency', 'time'}}; entries that are not of this form are skipped """
+    try:
+        with open(os.path.join(home, IDN_CACHE), 'r') as f:
+            idn_cache = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(idn_cache, dict):
+        return {}
+    valid = {}
+    for addr, entry in idn_cache.items():
+        try:
+            if isinstance(entry['idn'], str) and float(entry['time']) >= 0 and float(entry['latency']) >= 0:
+                valid[addr] = entry
+        except (KeyError, TypeError, ValueError):
+            pass
+    return valid
+
+
+def _write_idn_cache(idn_cache):
+    """ write to a temporary file (unique to this writer) and rename over the cache file """
+    import tempfile
+    path = os.path.join(home, IDN_CACHE)
+    tmp_name = None
+    try:
+        fd, tmp_name = tempfile.mkstemp(dir=home, suffix='.tmp')
+        with os.fdopen(fd, 'w') as f:
+            json.dump(idn_cache, f, indent=1)
+        os.replace(tmp_name, path)
+    except OSError as e:
+        print('Warning: could not write the IDN cache {}: {}'.format(path, e))
+        if tmp_name is not None and os.path.exists(tmp_name):
+            os.remove(tmp_name)
+
+
+def _probe(mgr, addr, timeout):
+    """ open addr and query *IDN? with a timeout (seconds); returns (idn or None, seconds) """
+    t = time.perf_counter()
+    obj = None
+    try:
+        obj = mgr.open_resource(addr, open_timeout=int(timeout * 1000))
+        obj.timeout = int(timeout * 1000)  # ms
+        idn = obj.query('*IDN?').strip()
+    except Exception:
+        idn = None
+    finally:
+        if obj is not None:
+            try:
+                obj.close()
+            except Exception:
+                pass
+    return idn, time.perf_counter() - t
+
+
+def discover_instruments(addresses=None, timeout=1.0, max_workers=None, ttl=3600, list_ttl=0,
+                         filename='config.yaml'):
+    """
+    Query *IDN? of VISA instruments in parallel. Each probe has a short timeout so that a
+    powered-off or hung instrument delays discovery by one timeout (not one per instrument).
+    Successful IDN results are cached (~/.instrbuilder/idn_cache.json) for ttl seconds.
+
+    Parameters
+    ----------
+    addresses : list (of str), optional
+        VISA addresses to probe; defaults to the instruments found by find_visa_connected
+    timeout : float, optional
+        timeout of each probe (seconds)
+    max_workers : int, optional
+        the most probes that run at once; defaults to probing every address at once
+    ttl : float, optional
+        maximum age (seconds) of a cached IDN; 0 probes every address
+    list_ttl : float, optional
+        reuse a listing of the VISA resources up to list_ttl seconds old (when addresses is not
+        given); the default enumerates the bus so that new instruments are found
+    filename : str, optional
+        The YAML configuration filename (to match addresses to configured names)
+
+    Returns
+    -------
+    list (of Discovered)
+        (address, idn, latency, config_name, cached) in the order of addresses
+
+    Example
+    -------
+    for d in discover_instruments():
+        print(d.address, d.idn, d.config_name)
+    """
+    if addresses is None:
+        addresses = [k for k in find_visa_connected(ttl=list_ttl)
+                     if any([k.startswith(prefix) for prefix in INSTR_PREFIXES])]
+    try:
+        config_names = _config_names(config_registry.load(filename))
+    except OSError:
+        config_names = {}
+
+    idn_cache = _read_idn_cache()
+    now = time.time()
+    results = {}
+    to_probe = []
+    for addr in addresses:
+        entry = idn_cache.get(addr)
+        if entry is not None and now - entry['time'] < ttl:
+            results[addr] = Discovered(addr, entry['idn'], entry['latency'], config_names.get(addr), True)
+        else:
+            to_probe.append(addr)
+
+    if to_probe:
+        mgr = resource_manager()
+        workers = len(to_probe) if max_workers is None else min(max_workers, len(to_probe))
+        with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {addr: executor.submit(_probe, mgr, addr, timeout) for addr in to_probe}
+            for addr, future in futures.items():
+                idn, latency = future.result()
+                results[addr] = Discovered(addr, idn, latency, config_names.get(addr), False)
+                if idn is not None:
+                    idn_cache[addr] = {'idn': idn, 'latency': latency, 'time': now}
+                else:
+                    idn_cache.pop(addr, None)
+        _write_idn_cache(idn_cache)
+
+    return [results[addr] for addr in addresses]
+
+
+def detect_instruments(filename='config.yaml', concurrent=False, timeout=1.0, ttl=0):
     """
     Detect PyVISA instruments connected to the computer return their addresses
     and add to YAML.
 
+    Parameters
+    ----------
+    filename : str, optional
+        The YAML configuration filename
+    concurrent : bool, optional
+        probe the addresses in parallel with discover_instruments; the user is asked about
+        instruments that are not in the configuration file after all probes finish
+    timeout : float, optional
+        timeout of each probe (seconds) when concurrent
+    ttl : float, optional
+        reuse IDN results up to ttl seconds old when concurrent (see discover_instruments)
+
     Returns
     -------
     list 
@@ -187,11 +405,9 @@ def detect_instruments(filename='config.yaml'):
     list
         a list of all PyVISA addresses found that are not in the config file
     """
-
     configs = None
     try:
-        with open(os.path.join(home, filename), 'r') as yaml_config:
-            configs = yaml.safe_load(yaml_config)
+        configs = config_registry.load(filename)
     except OSError as e: 
         print('except')
         configs = {}
@@ -200,18 +416,28 @@ def detect_instruments(filename='config.yaml'):
     device_addrs = find_visa_connected()
     instr_addrs = [k for k in device_addrs if any([k.startswith(prefix) for prefix in INSTR_PREFIXES])]
 
-    for addr in instr_addrs:
-        mgr = visa.ResourceManager()
-        obj = mgr.open_resource(addr)
-        try:
-            res = obj.query('*IDN?')
+    if concurrent:
+        for d in discover_instruments(instr_addrs, timeout=timeout, ttl=ttl, filename=filename):
             print('-'*40)
-            print('Instrument address {}:'.format(addr))
-            print(res.strip('\n'))
-        except Exception as e:
-            print('ID failed on address: {}'.format(addr))
-            print(e)
-        obj.close()
+            if d.idn is None:
+                print('ID failed on address: {} ({:.2f} s)'.format(d.address, d.latency))
+            else:
+                print('Instrument address {}{}:'.format(
+                    d.address, '' if d.config_name is None else ' ({})'.format(d.config_name)))
+                print(d.idn)
+    else:
+        mgr = resource_manager()
+        for addr in instr_addrs:
+            obj = mgr.open_resource(addr)
+            try:
+                res = obj.query('*IDN?')
+                print('-'*40)
+                print('Instrument address {}:'.format(addr))
+                print(res.strip('\n'))
+            except Exception as e:
+                print('ID failed on address: {}'.format(addr))
+                print(e)
+            obj.close()
     print('-' * 40)
 
     # create list of the addresses tracked in the config file
@@ -236,7 +462,7 @@ def detect_instruments(filename='config.yaml'):
     return instr_addrs, not_in_config
 
 
-def open_by_name(name, name_attached=None, filename='config.yaml', **kwargs):
+def open_by_name(name, name_attached=None, filename='config.yaml', lazy=True, **kwargs):
     """
     Use the system configuration file to open an instrument by name
 
@@ -249,42 +475,74 @@ def open_by_name(name, name_attached=None, filename='config.yaml', **kwargs):
         configuration file is used
     filename : str
         The YAML configuration filename
+    lazy : bool, optional
+        build each command when it is first used (see command.CommandTable)
 
     Returns
     -------
     An instrument object
 
     """
-    configs = None
-    with open(os.path.join(home, filename), 'r') as yaml_config:
-        configs = yaml.safe_load(yaml_config)
+    configs = config_registry.load(filename)
+    return _open_configured(configs, name, name_attached, lazy, **kwargs)
+
+
+def open_many(names, filename='config.yaml', lazy=True, **kwargs):
+    """
+    Open several instruments by name from one read of the configuration file. Instruments
+    of the same model (csv_folder) share the parsed command definitions.
+
+    Parameters
+    ----------
+    names : list (of str)
+        The names of the instruments in the configuration file
+    filename : str
+        The YAML configuration filename
+    lazy : bool, optional
+        build each command when it is first used (see command.CommandTable)
+
+    Returns
+    -------
+    dict
+        {name: instrument object}
+
+    Example
+    -------
+    instrs = open_many(['srs_lockin', 'my_multi', 'old_fg'])
+    """
+    configs = config_registry.load(filename)
+    return {name: _open_configured(configs, name, None, lazy, **kwargs) for name in names}
+
 
+def _open_configured(configs, name, name_attached=None, lazy=True, **kwargs):
+    """ open the instrument name of the configuration dictionary (see open_by_name) """
     # confirm name is in the configs
     if name not in configs['instruments']:
-        print('Error: {} is not a named instrument in the configuration file')
+        print('Error: {} is not a named instrument in the configuration file'.format(name))
 
+    instr_configs = configs['instruments'][name]
     cmd_map = os.path.join(configs['csv_directory'],
-                           configs['instruments'][name]['csv_folder'],
+                           instr_configs['csv_folder'],
                            configs['cmd_name'])
 
     lookup_file = os.path.join(configs['csv_directory'],
-                               configs['instruments'][name]['csv_folder'],
+                               instr_configs['csv_folder'],
                                configs['lookup_name'])
 
     cmd_list, inst_comm, unconnected = init_instrument(
-        cmd_map, addr=configs['instruments'][name]['address'], lookup=lookup_file,
-        **kwargs)
+        cmd_map, addr=instr_configs['address'], lookup=lookup_file,
+        lazy=lazy, **kwargs)
 
     if name_attached is not None:
         name = name_attached
 
-    InstrumentClass = getattr(instruments, configs['instruments'][name]['python_class'])
+    InstrumentClass = getattr(instruments, instr_configs['python_class'])
 
     return InstrumentClass(cmd_list, inst_comm, name, unconnected)
 
 def open_by_address(addr, csv_dir = None, csv_folder = 'tester', 
                     instr_class = 'TestInstrument', cmd_name = 'commands.csv', 
-                    lookup_name = 'lookup.csv', **kwargs):
+                    lookup_name = 'lookup.csv', lazy=True, **kwargs):
     """
     Open an instrument by address and optionally use the system config file
 
@@ -302,6 +560,8 @@ def open_by_address(addr, csv_dir = None, csv_folder = 'tester',
         The name of the csv file with commands
     lookup_name :
         The name of the csv file with a lookup map
+    lazy : bool, optional
+        build each command when it is first used (see command.CommandTable)
 
     Returns
     -------
@@ -326,7 +586,7 @@ def open_by_address(addr, csv_dir = None, csv_folder = 'tester',
                                configs['lookup_name'])
 
     cmd_list, inst_comm, unconnected = init_instrument(
-        cmd_map, addr=addr, lookup=lookup_file, **kwargs)
+        cmd_map, addr=addr, lookup=lookup_file, lazy=lazy, **kwargs)
 
     InstrumentClass = getattr(instruments, instr_class)
     name = 'tester'
@@ -4,9 +4,11 @@
 # University of St. Thomas
 
 # standard library imports
-import numpy as np
 import sys
+import threading
 import time
+# imports that may need installation
+import numpy as np
 
 # local package imports
 from instrbuilder.scpi import SCPI
@@ -52,7 +54,73 @@ class KeysightSMU(SCPI):
         super().__init__(
             cmd_list, comm_handle, name=name, unconnected=unconnected)
 
-class RigolOscilloscope(SCPI):
+class Oscilloscope(SCPI):
+    """Oscilloscope with binary waveform download (get_waveform).
+
+    The waveform preamble (:WAV:PRE?) is read once for each waveform setup and kept until a
+    command of a subsystem in preamble_subsystems (e.g. a timebase or channel setting) is set.
+    """
+
+    # sets of these subsystems may change the preamble (points, increments, origins)
+    preamble_subsystems = ('time', 'channel', 'acquire', 'waveform', 'system')
+    # the waveform setup of get_waveform, which is part of the preamble key
+    waveform_setup_cmds = ('waveform_source', 'waveform_format', 'waveform_byteorder',
+                           'waveform_unsigned', 'waveform_mode')
+
+    def __init__(self,
+                 cmd_list,
+                 comm_handle,
+                 name='osc',
+                 unconnected=False):
+        self._preamble = {}
+        self._waveform_setup = None  # the key of the setup sent to the instrument
+        super().__init__(
+            cmd_list, comm_handle, name=name, unconnected=unconnected)
+
+    def set(self, name, value=None, configs={}):
+        if name in self.waveform_setup_cmds:
+            self._waveform_setup = None
+        elif name in self._cmds and self._cmds[name].subsystem in self.preamble_subsystems:
+            self._preamble.clear()
+            self._waveform_setup = None
+        return super().set(name, value, configs)
+
+    def _waveform_preamble(self, key, setup):
+        """ send the setup (if needed) and read the preamble (if not kept) """
+        if self._waveform_setup != key:
+            self.set_many(setup)
+            self._waveform_setup = key
+        preamble = self._preamble.get(key)
+        if preamble is None:
+            preamble = self._preamble[key] = self.get('waveform_preamble')
+        return preamble
+
+    def _read_waveform(self, key, setup, dtype):
+        """ send the setup (if needed), read the preamble (if not kept) and the binary data """
+        from instrbuilder.scpi import ieee_block
+        preamble = self._waveform_preamble(key, setup)
+        self.comm_handle.write(':WAV:DATA?')
+        data = ieee_block(self.comm_handle.read_raw(), dtype)
+        return data, preamble
+
+    @staticmethod
+    def _time_axis(num, preamble):
+        """ time (float32) of num points: (index - xreference) * xincrement + xorigin """
+        x_inc, x_orig, x_ref = preamble[4:7]
+        t = np.arange(num, dtype=np.float32)
+        t *= np.float32(x_inc)
+        t += np.float32(x_orig - x_ref * x_inc)
+        return t
+
+    def _scale(self, data, preamble, y_gain, y_offset):
+        """ time and voltage (float32) of data: volts = data * y_gain + y_offset """
+        t = self._time_axis(data.size, preamble)
+        volts = np.multiply(data, np.float32(y_gain), dtype=np.float32)
+        volts += np.float32(y_offset)
+        return t, volts
+
+
+class RigolOscilloscope(Oscilloscope):
     def __init__(self,
                  cmd_list,
                  comm_handle,
@@ -63,8 +131,30 @@ class RigolOscilloscope(SCPI):
         # Override of "single line" SCPI functions
         self._cmds['display_data'].getter_override = self.display_data
 
-    def display_data(self):
+    def get_waveform(self, chan=1, fmt='BYTE', mode='NORM'):
+        """ download the waveform of a channel in binary and scale it with the preamble
+
+        Parameters
+        ----------
+        chan : int, optional
+        fmt : str, optional
+            'BYTE' or 'WORD'
+        mode : str, optional
+            'NORM' (the points on screen), 'MAX' or 'RAW' (memory; stop the acquisition first).
+            A single read returns at most 250000 BYTE points.
+
+        Returns
+        ----------
+        (np.array, np.array)
+            time [s] and voltage, float32
+        """
+        setup = [('waveform_source', chan), ('waveform_mode', mode), ('waveform_format', fmt)]
+        data, pre = self._read_waveform((chan, fmt, mode), setup, 'u1' if fmt == 'BYTE' else '<u2')
+        # voltage = (data - yorigin - yreference) * yincrement
+        y_inc, y_orig, y_ref = pre[7:10]
+        return self._scale(data, pre, y_inc, -(y_orig + y_ref) * y_inc)
 
+    def display_data(self):
         t = self.comm_handle.query_binary_values(
             ':DISP:DATA? PNG, ON', datatype='B', header_fmt='ieee')
         return np.array(t, dtype='B')
@@ -73,7 +163,7 @@ class RigolOscilloscope(SCPI):
         """ get the display_data from the display and save to a file """
         filewriter(self.display_data(), filename, filetype)
 
-class KeysightOscilloscope(SCPI):
+class KeysightOscilloscope(Oscilloscope):
     def __init__(self,
                  cmd_list,
                  comm_handle,
@@ -84,8 +174,38 @@ class KeysightOscilloscope(SCPI):
         # Override of "single line" SCPI functions
         self._cmds['display_data'].getter_override = self.display_data
 
-    def display_data(self):
+    def _waveform_setup_cmds(self, chan, fmt):
+        setup = [('waveform_source', chan), ('waveform_format', fmt), ('waveform_unsigned', 1)]
+        if fmt == 'WORD':
+            setup.append(('waveform_byteorder', 'LSBF'))
+        return setup
+
+    @staticmethod
+    def _y_scale(preamble):
+        """ (gain, offset) of voltage = data * gain + offset;
+        from voltage = (data - yreference) * yincrement + yorigin """
+        y_inc, y_orig, y_ref = preamble[7:10]
+        return y_inc, y_orig - y_ref * y_inc
+
+    def get_waveform(self, chan=1, fmt='BYTE'):
+        """ download the waveform of a channel in binary and scale it with the preamble
+
+        Parameters
+        ----------
+        chan : int, optional
+        fmt : str, optional
+            'BYTE' (8 bit) or 'WORD' (16 bit)
+
+        Returns
+        ----------
+        (np.array, np.array)
+            time [s] and voltage, float32
+        """
+        data, pre = self._read_waveform((chan, fmt), self._waveform_setup_cmds(chan, fmt),
+                                        'u1' if fmt == 'BYTE' else '<u2')
+        return self._scale(data, pre, *self._y_scale(pre))
 
+    def display_data(self):
         t = self.comm_handle.query_binary_values(
             ':DISP:DATA? PNG, COL', datatype='B', header_fmt='ieee')
         return np.array(t, dtype='B')
@@ -104,8 +224,94 @@ class KeysightMSOX3000(KeysightOscilloscope):
         super().__init__(
             cmd_list, comm_handle, name=name, unconnected=unconnected)
 
+    def acquire_segments(self, n, channels=1, fmt='BYTE', timeout=10.0, poll=0.01):
+        """ capture n triggers into segmented memory and download every segment.
+
+        The acquisition is armed once (:SING) and waited for once; each segment is then read
+        with one query (select the segment and read its time tag) and one binary read per channel.
+        The scope is left in segmented mode.
+
+        Parameters
+        ----------
+        n : int
+            number of segments (triggers), at least 2 (the range of :ACQ:SEGM:COUN);
+            use get_waveform for a single acquisition
+        channels : int or list (of int), optional
+            a channel number, or a list of channels (even of one) for a channel axis in the voltages
+        fmt : str, optional
+            'BYTE' or 'WORD'
+        timeout : float, optional
+            seconds to wait for the n triggers
+        poll : float, optional
+            seconds between checks that the acquisition is done
+
+        Returns
+        ----------
+        (np.array, np.array, np.array)
+            time [s] of the points (the same for each segment),
+            voltages (float32) of shape (n, points) if channels is an int or (n, len(channels), points) if a list,
+            time tags [s] of each segment (relative to the first trigger)
+
+        Example
+        -------
+        t, v, tags = osc.acquire_segments(200, channels=[1, 2])
+        """
+        from instrbuilder.scpi import ieee_block
+        if n < 2:
+            print('Segmented acquisition needs at least 2 segments, got {}; use get_waveform for one'.format(n))
+            raise ValueError
+        chans = list(channels) if np.ndim(channels) else [channels]
+
+        self.set_many([('acq_mode', 'SEGM'), ('acq_segment_count', n)])
+        self.set('single_acq')
+        self.get('operation_complete')  # :SING is processed, the scope is running
+        t_end = time.time() + timeout
+        while self.get('is_running'):
+            if time.time() > t_end:
+                print('Segmented acquisition of {} triggers did not complete in {} s'.format(n, timeout))
+                raise TimeoutError
+            time.sleep(poll)
+
+        # the preamble and scaling of each channel are the same for all segments
+        gains = []
+        offsets = []
+        for chan in chans:
+            pre = self._waveform_preamble((chan, fmt), self._waveform_setup_cmds(chan, fmt))
+            gain, offset = self._y_scale(pre)
+            gains.append(np.float32(gain))
+            offsets.append(np.float32(offset))
+        if len(chans) == 1:
+            data_queries = [self._cmds['waveform_data'].format_get({})]
+        else:
+            data_queries = [self._set_str(self._cmds['waveform_source'], chan) + self.cmd_separator
+                            + self._cmds['waveform_data'].format_get({}) for chan in chans]
+            self._waveform_setup = None  # the source changes below
+        index_cmd = self._cmds['acq_segment_index']
+        ttag_query = self.cmd_separator + self._cmds['waveform_segment_ttag'].format_get({})
+        dtype = 'u1' if fmt == 'BYTE' else '<u2'
+
+        ttags = np.empty(n)
+        volts = None
+        for idx in range(n):
+            ttags[idx] = float(self._ask(index_cmd.format_set(idx + 1, {}) + ttag_query))
+            for k, query in enumerate(data_queries):
+                self.comm_handle.write(query)
+                data = ieee_block(self.comm_handle.read_raw(), dtype)
+                if volts is None:
+                    volts = np.empty((n, len(chans), data.size), dtype=np.float32)
+                np.multiply(data, gains[k], out=volts[idx, k])
+                volts[idx, k] += offsets[k]
+
+        t = self._time_axis(volts.shape[-1], pre)
+        return t, (volts[:, 0] if np.ndim(channels) == 0 else volts), ttags
+
 
 class SRSLockIn(SCPI):
+    # SR810 commands are not SCPI paths, joined with ';' only
+    cmd_root = ''
+    # the serial reader stops at the first response terminator
+    compound_query = False
+
     def __init__(self,
                  cmd_list,
                  comm_handle,
@@ -117,8 +323,203 @@ class SRSLockIn(SCPI):
         if unconnected:
             self._cmds['ch1_disp']._unconnected_val = b'1,0\r'
 
+    def fast_stream(self, ring_size=65536, callback=None, fast_mode=2, delay_start=True, block_points=64):
+        """ start a scan in Fast Data Transfer mode: the lock-in sends binary X and Y every sample
+        (GPIB only). A background thread decodes the data into a ring buffer; see FastStream.
+
+        Parameters
+        ----------
+        ring_size : int, optional
+            number of points kept
+        callback : function, optional
+            called (from the reader thread) with (t, x, y) arrays of each new block of points
+        fast_mode : int, optional
+            1 or 2 (see the FAST command)
+        delay_start : bool, optional
+            start with STRD (0.5 s delay) rather than STRT
+        block_points : int, optional
+            number of points the reader asks the transport for at a time
+
+        Returns
+        ----------
+        FastStream
+
+        Example
+        -------
+        with lia.fast_stream() as stream:
+            for t, x, y in stream.blocks(timeout=2):
+                ...
+        """
+        return FastStream(self, ring_size=ring_size, callback=callback, fast_mode=fast_mode,
+                          delay_start=delay_start, block_points=block_points)
+
+
+class FastStream(object):
+    """SR810 Fast Data Transfer (FAST) acquisition, started by SRSLockIn.fast_stream.
+
+    During a scan the lock-in sends X then Y as signed 16-bit integers (LSB first) for every sample.
+    The integers are scaled to volts by sensitivity / 30000 (offsets and expands are not removed).
+    Sample times are the start time + sample index / sample rate, or the arrival time if the sample
+    rate is 'Trigger'.
+
+    Attributes
+    ----------
+    count : int
+        number of points received
+    error : Exception
+        the error that stopped the reader thread (None if none)
+
+    Methods
+    ----------
+    blocks(timeout=None) :
+        generator of (t, x, y) arrays of the points that arrived since the last block
+    latest(num=None) :
+        the most recent points in the ring buffer
+    stop(timeout=5) :
+        end the reader thread, pause the scan and turn off fast transfer
+    """
+
+    def __init__(self, lia, ring_size=65536, callback=None, fast_mode=2, delay_start=True, block_points=64):
+        try:
+            self._read_bytes = lia.comm_handle.read_bytes
+        except AttributeError:
+            print('Fast data transfer needs a communication handle with read_bytes (e.g. pyvisa over GPIB)')
+            raise NotImplementedError
+
+        self._lia = lia
+        self._scale = lia.get('sensitivity') / 30000
+        rate = lia.get('sample_rate')
+        self._rate = None if rate == 'Trigger' else rate
+        self._callback = callback
+        self._block_bytes = 4 * block_points
+
+        self._t = np.zeros(ring_size)
+        self._x = np.zeros(ring_size, dtype=np.float32)
+        self._y = np.zeros(ring_size, dtype=np.float32)
+        self.count = 0
+        self._read_pos = 0
+        self.error = None
+        self._new_data = threading.Condition()
+        self._stopping = threading.Event()
+        self._done = False
+
+        lia.set('reset_scan')
+        lia.set('fast_transfer', fast_mode)
+        if delay_start:
+            lia.set('start_delay')
+            self._t0 = time.time() + 0.5
+        else:
+            lia.set('start_scan')
+            self._t0 = time.time()
+        self._thread = threading.Thread(target=self._reader, name='sr810_fast', daemon=True)
+        self._thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _reader(self):
+        leftover = b''
+        try:
+            while not self._stopping.is_set():
+                try:
+                    data = self._read_bytes(self._block_bytes)
+                except Exception:
+                    if self._stopping.is_set():  # e.g. a timeout after the pause
+                        break
+                    raise
+                if not data:
+                    continue
+                data = leftover + data
+                usable = len(data) - len(data) % 4
+                leftover = data[usable:]
+                if usable:
+                    self._store(np.frombuffer(data[:usable], dtype='<i2'))
+        except Exception as e:
+            print('Fast transfer reader stopped: {}'.format(e))
+            self.error = e
+        finally:
+            with self._new_data:
+                self._done = True
+                self._new_data.notify_all()
+
+    def _store(self, words):
+        x = words[0::2] * self._scale
+        y = words[1::2] * self._scale
+        num = len(x)
+        idx = self.count + np.arange(num)
+        if self._rate is None:
+            t = np.full(num, time.time())
+        else:
+            t = self._t0 + idx / self._rate
+        size = len(self._t)
+        if num > size:
+            t, x, y, idx = t[-size:], x[-size:], y[-size:], idx[-size:]
+        ring = idx % size
+        with self._new_data:
+            self._t[ring] = t
+            self._x[ring] = x
+            self._y[ring] = y
+            self.count += num
+            self._new_data.notify_all()
+        if self._callback is not None:
+            self._callback(t, x, y)
+
+    def _take(self, start, stop):
+        ring = np.arange(start, stop) % len(self._t)
+        return self._t[ring], self._x[ring], self._y[ring]
+
+    def latest(self, num=None):
+        """ the most recent num points (all in the ring buffer if None) as (t, x, y) """
+        with self._new_data:
+            num = min(self.count, len(self._t), num or len(self._t))
+            return self._take(self.count - num, self.count)
+
+    def blocks(self, timeout=None):
+        """ generator of (t, x, y) arrays of the points that arrived since the last block.
+        Ends when the stream stops or no data arrives within timeout [s]. """
+        while True:
+            with self._new_data:
+                if self.count == self._read_pos and not self._done:
+                    self._new_data.wait(timeout)
+                start, stop = self._read_pos, self.count
+                if stop == start:
+                    return
+                if stop - start > len(self._t):
+                    print('Warning: fast stream ring buffer overrun, {} points lost'.format(
+                        stop - start - len(self._t)))
+                    start = stop - len(self._t)
+                self._read_pos = stop
+                block = self._take(start, stop)
+            yield block
+
+    def stop(self, timeout=5):
+        """ end the reader thread, then pause the scan and turn off fast transfer.
+        The thread ends after its current read, so PAUS is not written while it reads the same handle.
+
+        Parameters
+        ----------
+        timeout : float, optional
+            seconds to wait for the reader thread
+        """
+        if self._stopping.is_set():
+            return
+        self._stopping.set()
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            print('Warning: fast transfer reader did not stop within {} s'.format(timeout))
+        self._lia.set('pause_scan')
+        self._lia.set('fast_transfer', 0)
+
 
 class KeysightMultimeter(SCPI):
+    # bits of the Standard Operation Register (oper_cond)
+    OPER_MEASURING = 4
+    OPER_WAIT_TRIG = 5
+    OPER_THRESHOLD = 9
+
     def __init__(self,
                  cmd_list,
                  comm_handle,
@@ -137,7 +538,6 @@ class KeysightMultimeter(SCPI):
 
     def hardcopy(self):
         """ Transfers a hard-copy (image) of the screen to the host as a  """
-
         self.comm_handle.query_delay = 4
 
         img_data = self.comm_handle.query_binary_values(
@@ -160,17 +560,18 @@ class KeysightMultimeter(SCPI):
         Composite function to measure a burst of voltages
         measure a burst of triggered voltage readings
         """
-        self.set('volt_aperture', aperture)
-        self.set('trig_source', trig_source)  # BUS = remote interface (host); EXT = external signal
-        if trig_source == 'EXT':
-            self.set('trig_slope', trig_slope)
-        self.set('trig_count', trig_count)
-        self.set('sample_count', reads_per_trigger)
-        if volt_range is not None:
-            self.set('volt_range_auto', 0, configs={'ac_dc': 'DC'}) # turn off auto-range
-            self.set('volt_range', volt_range, configs={'ac_dc': 'DC'}) # set range
-        if trig_delay is not None:
-            self.set('trig_delay', trig_delay)
+        with self.batch():
+            self.set('volt_aperture', aperture)
+            self.set('trig_source', trig_source)  # BUS = remote interface (host); EXT = external signal
+            if trig_source == 'EXT':
+                self.set('trig_slope', trig_slope)
+            self.set('trig_count', trig_count)
+            self.set('sample_count', reads_per_trigger)
+            if volt_range is not None:
+                self.set('volt_range_auto', 0, configs={'ac_dc': 'DC'}) # turn off auto-range
+                self.set('volt_range', volt_range, configs={'ac_dc': 'DC'}) # set range
+            if trig_delay is not None:
+                self.set('trig_delay', trig_delay)
         self.set('initialize')
         if trig_source == 'BUS':
             print('Sending (bus) trigger command')
@@ -187,34 +588,162 @@ class KeysightMultimeter(SCPI):
         """
         measure a burst of triggered voltage readings
         maximum rate of external trigger is 5 kHz
-        """
-        self.set('volt_aperture', aperture)
-        self.set('trig_source', trig_source)  # BUS = remote interface (host); EXT = external signal
-        if trig_source == 'EXT':
-            self.set('trig_slope', trig_slope)
-        self.set('volt_autozero_dc', 0)
-        self.set('trig_count', trig_count)
-        self.set('sample_count', reads_per_trigger)
-        if volt_range is not None:
-            self.set('volt_range_auto', 0, configs={'ac_dc': 'DC'})  # turn off auto-range
-            self.set('volt_range', volt_range, configs={'ac_dc': 'DC'})  # set range
-
-        self.set('sample_source', 'TIM')
-        self.set('sample_timer', sample_timer)
-        if trig_delay is not None:
-            self.set('trig_delay', trig_delay)
-
-        total_arr = np.array([])
-        for i in range(repeats):
-            self.set('initialize')
-            if trig_source == 'BUS':
-                print('Sending (bus) trigger command')
-                self.set('trig')
-            # print('Expecting {} readings'.format(trig_count * reads_per_trigger))
 
-            x = self.get('fetch')
-            total_arr = np.append(total_arr, x)
-        return total_arr
+        The readings are transferred in binary (FORM:DATA REAL) into a preallocated array.
+        The next burst is armed (initialize) as soon as the readings of a burst are received,
+        so the instrument measures while the host decodes. The data format is set back to ASCII at the end.
+
+        Returns
+        ----------
+        np.array
+            repeats * trig_count * reads_per_trigger readings
+        """
+        with self.batch():
+            self.set('volt_aperture', aperture)
+            self.set('trig_source', trig_source)  # BUS = remote interface (host); EXT = external signal
+            if trig_source == 'EXT':
+                self.set('trig_slope', trig_slope)
+            self.set('volt_autozero_dc', 0)
+            self.set('trig_count', trig_count)
+            self.set('sample_count', reads_per_trigger)
+            if volt_range is not None:
+                self.set('volt_range_auto', 0, configs={'ac_dc': 'DC'})  # turn off auto-range
+                self.set('volt_range', volt_range, configs={'ac_dc': 'DC'})  # set range
+
+            self.set('sample_source', 'TIM')
+            self.set('sample_timer', sample_timer)
+            if trig_delay is not None:
+                self.set('trig_delay', trig_delay)
+            self.set('data_format', 'REAL')
+            self.set('byte_order', 'SWAP')  # little-endian, see fetch_real
+
+        def arm():
+            with self.batch():
+                self.set('initialize')
+                if trig_source == 'BUS':
+                    self.set('trig')
+
+        fetch = self._cmds['fetch_real']
+        fetch_query = fetch.format_get({})
+        total_arr = np.empty((repeats, trig_count * reads_per_trigger))
+        try:
+            arm()
+            for i in range(repeats):
+                raw = self._query(fetch, fetch_query)  # waits for burst i
+                if i + 1 < repeats:
+                    arm()  # burst i+1 is measured while burst i is decoded
+                x = self._convert_get(fetch, raw)
+                if x is None:
+                    total_arr[i] = np.nan
+                elif np.size(x) != total_arr.shape[1]:
+                    print('Error: burst {} returned {} readings; expected trig_count * reads_per_trigger = {}'.format(
+                        i, np.size(x), total_arr.shape[1]))
+                    if i + 1 < repeats:
+                        self.set('abort')  # the next burst is armed
+                    raise ValueError
+                else:
+                    total_arr[i] = x
+        finally:
+            self.set('data_format', 'ASC')
+        return total_arr.reshape(-1)
+
+    def stream(self, total=None, block_points=None, poll=0.05, threshold=None,
+               sample_interval=None, timeout=None, initiate=True):
+        """ generator of the readings of a long measurement while it runs. Readings are removed from the
+        instrument memory (DATA:REM?) in binary as they become available, so the memory never fills.
+        Configure the measurement (trigger and sample counts, etc.) first.
+
+        Parameters
+        ----------
+        total : int, optional
+            stop after this many readings; otherwise when the measurement is done
+        block_points : int, optional
+            the most readings removed at a time
+        poll : float, optional
+            seconds between polls of the instrument
+        threshold : int, optional
+            if given, wait for the memory threshold status bit (data_pts_threshold) rather than any reading
+        sample_interval : float, optional
+            seconds between readings (e.g. the sample_timer). If given the timestamps are
+            reading index * sample_interval, otherwise the (host) time the readings were removed
+        timeout : float, optional
+            stop if no readings arrive for this many seconds
+        initiate : bool, optional
+            send initialize to start the measurement
+
+        Yields
+        ----------
+        (np.array, np.array)
+            timestamps [s] and readings
+
+        Example
+        -------
+        dmm.set('trig_count', 1e6)
+        for t, v in dmm.stream(sample_interval=1e-3):
+            log.write(t, v)
+        """
+        busy_bits = (1 << self.OPER_MEASURING) | (1 << self.OPER_WAIT_TRIG)
+        with self.batch():
+            self.set('data_format', 'REAL')
+            self.set('byte_order', 'SWAP')  # little-endian, see data_remove
+            if threshold is not None:
+                self.set('data_pts_threshold', threshold)
+            if initiate:
+                self.set('initialize')
+
+        count = 0
+        busy = True
+        last_data = time.time()
+        try:
+            while total is None or count < total:
+                if threshold is None:
+                    pts, cond = self.get_many(['data_pts', 'oper_cond'])
+                    self._check_stream_poll(cond)
+                    busy = bool(cond & busy_bits)
+                    if not busy:
+                        # the measurement may have finished after data_pts was read
+                        pts = self.get('data_pts')
+                else:
+                    cond = self.get('oper_cond')
+                    self._check_stream_poll(cond)
+                    busy = bool(cond & busy_bits)
+                    # read the count once the threshold is reached, or for the last readings
+                    pts = self.get('data_pts') if (cond >> self.OPER_THRESHOLD) & 1 or not busy else 0
+                self._check_stream_poll(pts)
+
+                if pts:
+                    num = pts if block_points is None else min(pts, block_points)
+                    if total is not None:
+                        num = min(num, total - count)
+                    vals = self.get('data_remove', configs={'num_pts': num})
+                    if vals is None:
+                        return
+                    if sample_interval is None:
+                        t = np.full(vals.size, time.time())
+                    else:
+                        t = (count + np.arange(vals.size)) * sample_interval
+                    count += vals.size
+                    last_data = time.time()
+                    yield t, vals
+                    continue  # more readings may be ready
+                if not busy:
+                    return
+                if timeout is not None and time.time() - last_data > timeout:
+                    print('Warning: no readings for {} s; stopping the stream'.format(timeout))
+                    return
+                time.sleep(poll)
+        finally:
+            # stopped before the measurement is done (total reached, timeout or the consumer stopped)
+            if busy:
+                self.set('abort')
+            self.set('data_format', 'ASC')
+
+    @staticmethod
+    def _check_stream_poll(val):
+        """ stream cannot tell if the measurement is done from an unreadable status """
+        if val is None:
+            print('Error: could not read the reading count or operation status while streaming')
+            raise ValueError
 
     def burst_volt_setup(self, reads_per_trigger=1, aperture=1e-3,
                          trig_source='EXT', trig_count=1, trig_slope='POS',
@@ -223,16 +752,17 @@ class KeysightMultimeter(SCPI):
         measure a burst of triggered voltage readings that are saved to the instruments flash
         and then downloaded at the end
         """
-        self.set('volt_aperture', aperture)
-        self.set('trig_source', trig_source)  # BUS = remote interface (host); EXT = external signal
-        if trig_source == 'EXT':
-            self.set('trig_slope', trig_slope)
-        self.set('trig_count', trig_count)
-        self.set('sample_count', reads_per_trigger)
-        self.set('volt_range_auto', 0, configs={'ac_dc': 'DC'}) # turn off auto-range
-        self.set('volt_range', volt_range, configs={'ac_dc': 'DC'}) # set range
-        if trig_delay is not None:
-            self.set('trig_delay', trig_delay)
+        with self.batch():
+            self.set('volt_aperture', aperture)
+            self.set('trig_source', trig_source)  # BUS = remote interface (host); EXT = external signal
+            if trig_source == 'EXT':
+                self.set('trig_slope', trig_slope)
+            self.set('trig_count', trig_count)
+            self.set('sample_count', reads_per_trigger)
+            self.set('volt_range_auto', 0, configs={'ac_dc': 'DC'}) # turn off auto-range
+            self.set('volt_range', volt_range, configs={'ac_dc': 'DC'}) # set range
+            if trig_delay is not None:
+                self.set('trig_delay', trig_delay)
 
     def burst_volt_save(self, reads_per_trigger=1,
                         trig_source='EXT', trig_count=1, repeats=4,
@@ -249,25 +779,79 @@ class KeysightMultimeter(SCPI):
                 time.sleep(0.005)
             self.set('store_data', filename.format(i), )
 
-    def burst_volt_upload(self, repeats=4):
-        # read and unpack the binary data (8 byte IEEE-754 format)
-
-        # cannot use the standard SCPI get since we need to read raw binary data and apply a
-        #    different decoding
-        # x = self.get('upload_data', configs={'filename': filename.format(0)})
-
-        data_array = np.array([])
-        header_offset_bytes = 5
-        bytes_per_val = 8
-        for file_idx in range(repeats):
-            self.comm_handle.write('MMEM:UPL? "test_{}.dat"'.format(file_idx))
-            binary_data = self.comm_handle.read_raw()
-            from struct import unpack
-            num_values = int((len(binary_data)-header_offset_bytes-1)/bytes_per_val)
-            unpacked_data = unpack("<{}d".format(num_values), binary_data[header_offset_bytes:-1])
-            data_array = np.append(data_array, unpacked_data)
-
-        return data_array
+    def burst_volt_upload(self, repeats=4, out=None, overlap=False, filename='test_{}.dat', verbose=False):
+        """ upload the files saved by burst_volt_save from the instrument flash
+
+        The files are binary data (8 byte IEEE-754 format, little-endian) in an IEEE 488.2 block
+        which upload_data (getter_type ieee_block_f64_le) decodes without copying; the values are then
+        copied into the output. The throughput of each file is kept in upload_times.
+
+        Parameters
+        ----------
+        repeats : int, optional
+            number of files
+        out : np.array or np.memmap, optional
+            filled with the readings (must be large enough); if None an array is allocated
+            for repeats files the size of the first
+        overlap : bool, optional
+            upload file i+1 (in a thread) while file i is copied into the output
+        filename : str, optional
+            format string of the file names
+        verbose : bool, optional
+            print the throughput of each file
+
+        Returns
+        ----------
+        np.array
+            the readings (a view of out if provided)
+        """
+        cmd = self._cmds['upload_data']
+
+        def upload(file_idx):
+            t = time.perf_counter()
+            raw = self._query(cmd, cmd.format_get({'filename': filename.format(file_idx)}))
+            return raw, time.perf_counter() - t
+
+        executor = None
+        if overlap:
+            import concurrent.futures
+            executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+            pending = executor.submit(upload, 0)
+
+        self.upload_times = []
+        allocated = out is None
+        pos = 0
+        try:
+            for file_idx in range(repeats):
+                if overlap:
+                    raw, seconds = pending.result()
+                    if file_idx + 1 < repeats:
+                        pending = executor.submit(upload, file_idx + 1)
+                else:
+                    raw, seconds = upload(file_idx)
+                self.upload_times.append((filename.format(file_idx), len(raw), seconds))
+                if verbose:
+                    print('Uploaded {}: {} bytes in {:.3f} s ({:.2f} MB/s)'.format(
+                        filename.format(file_idx), len(raw), seconds, len(raw) / max(seconds, 1e-9) / 1e6))
+
+                data = self._convert_get(cmd, raw)
+                if data is None:
+                    continue
+                if out is None:
+                    out = np.empty(data.size * repeats)
+                elif allocated and pos + data.size > out.size:  # a file larger than the first
+                    out = np.concatenate((out[:pos], np.empty(data.size * (repeats - file_idx))))
+                out[pos:pos + data.size] = data
+                pos += data.size
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+        if out is None:
+            return np.array([])
+        if hasattr(out, 'flush'):  # memmap
+            out.flush()
+        return out[:pos]
 
 
 class KeysightNetworkAnalyzer(SCPI):
@@ -284,15 +868,16 @@ class KeysightNetworkAnalyzer(SCPI):
         self._cmds['snp_port_data'].getter_override = self.snp_port_data
 
     def snp_port_data(self):
+        from instrbuilder.scpi import ieee_block
         # data format lookups
-        datatypes = {32: 'f', 64: 'd'}
-        dtypes = {32: np.float32, 64: np.float64}
+        dtypes = {32: 'f4', 64: 'f8'}
 
         # 1 frequency channel + N^2 complex vectors
         n_vec = 1 + 2 * len(self._channels) ** 2;
 
         # retrieve format setting
         fd = int(self.get("form_data").split(",")[-1])
+        byte_order = '<' if self.get("form_bord") == 'SWAP' else '>'
 
         # trigger reading
         self.set("immediate")
@@ -302,13 +887,12 @@ class KeysightNetworkAnalyzer(SCPI):
             pass
    
         # retrieve binary data
-        raw = self.comm_handle.query_binary_values(
+        self.comm_handle.write(
             'CALCulate:DATA:SNP:PORTs? "{}"'.format(
-                ",".join([str(chan) for chan in self._channels])),
-            datatype=datatypes[fd])
+                ",".join([str(chan) for chan in self._channels])))
 
-        # flat array of data format
-        flat = np.array(raw, dtype=dtypes[fd])
+        # flat array of data format (a view of the binary block, no copy)
+        flat = ieee_block(self.comm_handle.read_raw(), byte_order + dtypes[fd])
 
         # reshape into components
         return flat.reshape((n_vec, int(flat.size / n_vec)))
@@ -325,45 +909,45 @@ class TestInstrument(SCPI):
 
     
 
-try:
-    # for Aardvark SPI control
-    from .command import Register
-    from .ic import IC
-    from .ic import AA  # aardvark adapter
-
-    def create_ada2200():
-
-        # ADA2200 register map
-        reg_map = {'serial_interface': 			0x0000,  # MSBs
-                   'chip_type': 				0x0006,
-                   'filter0':					0x0011,
-                   'analog_pin':				0x0028,
-                   'sync_control':				0x0029,
-                   'demod_control':				0x002A,
-                   'digital_pin':               0x002C,
-                   'clock_config':				0x002B}
-        # add other filter configuration registers
-        for i in range(1, 23):
-            reg_map['filter{}'.format(i)] = 0x0011 + i
-
-        regs = []
-        for r in reg_map:
-            regs.append(Register(name=r, address=reg_map[r],
-                                 read_write='R/W', is_config=True))
-
-        aardvark = AA()  # communication adapter
-        ada2200_scpi = IC(regs, aardvark,
-                          interface='SPI', name='ADA2200')
-        return ada2200_scpi
-
-except: 
-    def create_ada2200():
+def create_ada2200():
+    """ the ADA2200 (demodulator) IC controlled over SPI with an Aardvark adapter.
+    The Aardvark library is imported here (not when instruments is imported) since few setups have it.
+    Returns None if the import fails.
+    """
+    try:
+        # for Aardvark SPI control
+        from .command import Register
+        from .ic import IC
+        from .ic import AA  # aardvark adapter
+    except Exception:
+        print("Error: ", sys.exc_info()[0])
+        print('IC (integrated circuit imports failed)')
+        print('The aardvark.so or dll must be in the cwd or an importable path')
         print('ADA2200 will not work. Aardvark not imported correctly!')
-        pass
-    print("Error: ", sys.exc_info()[0])
-    print('IC (integrated circuit imports failed)')
-    print('The aardvark.so or dll must be in the cwd or an importable path')
-    print('Continuing anyways, since many may not use this portion...')
+        return None
+
+    # ADA2200 register map
+    reg_map = {'serial_interface': 			0x0000,  # MSBs
+               'chip_type': 				0x0006,
+               'filter0':					0x0011,
+               'analog_pin':				0x0028,
+               'sync_control':				0x0029,
+               'demod_control':				0x002A,
+               'digital_pin':               0x002C,
+               'clock_config':				0x002B}
+    # add other filter configuration registers
+    for i in range(1, 23):
+        reg_map['filter{}'.format(i)] = 0x0011 + i
+
+    regs = []
+    for r in reg_map:
+        regs.append(Register(name=r, address=reg_map[r],
+                             read_write='R/W', is_config=True))
+
+    aardvark = AA()  # communication adapter
+    ada2200_scpi = IC(regs, aardvark,
+                      interface='SPI', name='ADA2200')
+    return ada2200_scpi
 
 def filewriter(data, filename, filetype='png'):
     ''' Write a list or np.array of unsigned bytes to a file
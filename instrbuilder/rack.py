@@ -0,0 +1,220 @@
+'''
+A rack (group) of instruments that are read and written in parallel. Each instrument is
+accessed by one thread at a time (Rack and AsyncSCPI share the lock of the instrument), so a
+snapshot of the rack takes about as long as the slowest instrument rather than the sum of all of them:
+
+    rack = Rack(['srs_lockin', 'my_multi', 'old_fg'])   # names in the configuration file
+    configs = rack.snapshot()
+    print(rack.timing)
+'''
+
+# standard library imports
+import concurrent.futures
+import threading
+import time
+
+
+class Rack(object):
+    """A group of instruments with parallel get and set.
+
+    Parameters
+    ----------
+    instruments : dict or list
+        {name: instrument object}, or a list of names in the configuration file
+        which are opened with instrument_opening.open_many
+    max_workers : int, optional
+        size of the thread pool; defaults to one thread per instrument
+    filename : str, optional
+        The YAML configuration filename (when instruments is a list of names)
+
+    Attributes
+    ----------
+    instruments : dict
+        {name: instrument object}
+    timing : dict
+        {name: seconds} for each instrument in the last call made by this thread,
+        and 'total' for the whole call
+
+    Methods
+    ----------
+    run(calls) :
+        run a function of each instrument in parallel
+
+    get(requests) :
+        get values from several instruments
+
+    set(settings) :
+        set values on several instruments
+
+    snapshot(names=None) :
+        read the configuration (is_config getters) of the instruments
+
+    close() :
+        shut down the thread pool
+
+    """
+
+    def __init__(self, instruments, max_workers=None, filename='config.yaml'):
+        if not isinstance(instruments, dict):
+            from instrbuilder.instrument_opening import open_many
+            instruments = open_many(instruments, filename=filename)
+        self.instruments = dict(instruments)
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=max_workers or max(len(self.instruments), 1))
+        self._local = threading.local()
+
+    @property
+    def timing(self):
+        # per thread, so concurrent callers each see the timing of their own call
+        return getattr(self._local, 'timing', {})
+
+    def __getitem__(self, name):
+        return self.instruments[name]
+
+    def __iter__(self):
+        return iter(self.instruments)
+
+    def __len__(self):
+        return len(self.instruments)
+
+    def _timed(self, name, func):
+        """ run func(instrument) while holding the instrument lock; returns (result, seconds) """
+        instr = self.instruments[name]
+        with instr._io_lock:
+            t = time.perf_counter()
+            result = func(instr)
+            return result, time.perf_counter() - t
+
+    def run(self, calls):
+        """ run a function of each instrument in parallel
+
+        Parameters
+        ----------
+        calls : dict
+            {instrument name: function}; each function is called with the instrument object
+
+        Returns
+        ----------
+        dict
+            {instrument name: return of the function}
+
+        Raises
+        ----------
+        RackError
+            if any function raised; every function still runs to completion and the
+            results of the others are in RackError.results
+        """
+        t = time.perf_counter()
+        futures = {name: self._executor.submit(self._timed, name, func)
+                   for name, func in calls.items()}
+        results = {}
+        errors = {}
+        timing = {}
+        for name, future in futures.items():
+            try:
+                results[name], timing[name] = future.result()
+            except Exception as e:
+                print('Error: {} raised {!r}'.format(name, e))
+                errors[name] = e
+        timing['total'] = time.perf_counter() - t
+        self._local.timing = timing
+        if errors:
+            raise RackError(results, errors)
+        return results
+
+    def get(self, requests):
+        """ get values from several instruments; each instrument uses one get_many
+
+        Parameters
+        ----------
+        requests : dict
+            {instrument name: list of command names, or of (command name, configs) tuples}
+
+        Returns
+        ----------
+        dict
+            {instrument name: list of values in the order requested}
+
+        Example
+        -------
+        rack.get({'lia': ['phase', 'freq'], 'dmm': [('meas_volt', {'ac_dc': 'DC'})]})
+        """
+        calls = {}
+        for name, cmds in requests.items():
+            cmds = [c if isinstance(c, tuple) else (c, {}) for c in cmds]
+            calls[name] = lambda instr, cmds=cmds: _get_many(
+                instr, [c for c, _ in cmds], [cfg for _, cfg in cmds])
+        return self.run(calls)
+
+    def set(self, settings):
+        """ set values on several instruments; each instrument uses one set_many
+
+        Parameters
+        ----------
+        settings : dict
+            {instrument name: settings as accepted by SCPI.set_many}
+
+        Returns
+        ----------
+        dict
+            {instrument name: return of set_many}
+        """
+        return self.run({name: lambda instr, s=s: instr.set_many(s)
+                         for name, s in settings.items()})
+
+    def snapshot(self, names=None):
+        """ read every configuration value (is_config getters that need no configs)
+
+        Parameters
+        ----------
+        names : list (of str), optional
+            instruments to read; defaults to all
+
+        Returns
+        ----------
+        dict
+            {instrument name: {command name: value}}
+        """
+        if names is None:
+            names = list(self.instruments)
+        requests = {}
+        for name in names:
+            cmds = self.instruments[name]._cmds
+            requests[name] = [k for k in cmds if getattr(cmds[k], 'getter', False)
+                              and cmds[k].is_config and not cmds[k].get_config_keys]
+        values = self.get(requests)
+        return {name: dict(zip(requests[name], values[name])) for name in values}
+
+    def close(self):
+        self._executor.shutdown()
+
+
+class RackError(Exception):
+    """ one or more instruments of Rack.run raised
+
+    Attributes
+    ----------
+    results : dict
+        {instrument name: return of the function} of the instruments that succeeded
+    errors : dict
+        {instrument name: exception}
+    """
+
+    def __init__(self, results, errors):
+        super(RackError, self).__init__('{} raised: {}'.format(
+            ', '.join(errors), '; '.join('{!r}'.format(e) for e in errors.values())))
+        self.results = results
+        self.errors = errors
+
+
+def _get_many(instr, names, configs):
+    """ get_many for SCPI instruments, one get at a time for others (e.g. IC) """
+    try:
+        get_many = instr.get_many
+    except AttributeError:
+        return [instr.get(name, cfg) for name, cfg in zip(names, configs)]
+    return get_many(names, configs)
+
+
+# alias
+InstrumentGroup = Rack
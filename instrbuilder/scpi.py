@@ -12,21 +12,20 @@ a SCPI object (using the function init_instrument) from a CSV file of commands a
 import warnings
 import time
 import sys
-import math
-import ast
+import re
 from collections import defaultdict
+import contextlib
 import functools
+import threading
 # imports that may need installation
-import pandas as pd
-import colorama
 import numpy as np
-import serial
-import pyvisa as visa
-from pyvisa.constants import StatusCode
+# pyvisa, pyserial and colorama are imported where they are used, so that importing
+#   instrbuilder is fast and does not need the transports that are not used
 
 # local package imports
-from instrbuilder.command import Command
+from instrbuilder.command import Command, CommandTable
 from instrbuilder import utils
+from instrbuilder import definitions
 
 # -----------------------------------------
 # a dictionary of functions that are used to convert return values from getters
@@ -38,21 +37,71 @@ convert_return['int'] = int
 convert_return['nan'] = str
 
 
-def arr_str(str_in):
-    """ convert string such as '2.3', '5.4', '9.9' to a list of floats """
-    return np.asarray(list(map(lambda x: float(x), str_in.split(','))))
+_empty_field = re.compile(r',\s*(,|$)')
 
 
-def arr_bytes(bytes_in):
-    """ convert array of bytes such as b'1,0\r' to a list of floats """
-    str_in = bytes_in.decode('utf-8').rstrip()
-    return np.asarray(list(map(lambda x: int(x), str_in.split(','))))
+def _parse_numbers(text, dtype, out=None):
+    """ parse comma separated numbers with numpy (C speed). Surrounding whitespace (e.g. '\r'),
+    trailing commas and empty fields are ignored. If out (a numpy array) is provided the values are
+    copied into it and the filled portion of out is returned. """
+    if isinstance(text, (bytes, bytearray)):
+        text = text.decode('utf-8')
+    text = text.strip(' \t\r\n,')
+    if _empty_field.search(text):  # np.fromstring stops at an empty field
+        text = ','.join(field for field in text.split(',') if field.strip())
+    arr = np.fromstring(text, dtype=dtype, sep=',')
+    if arr.size != (text.count(',') + 1 if text else 0):  # stopped at a value that is not a number
+        raise ValueError('could not convert string to {}: {}'.format(np.dtype(dtype).name, text[:40]))
+    if out is None:
+        return arr
+    out[:arr.size] = arr
+    return out[:arr.size]
 
 
-def arr_bytes_floats(bytes_in):
-    """ convert array of bytes such as b'-3.051776e-004,-3.051776e-004,\r', to a list of floats """
-    str_in = bytes_in.decode('utf-8').rstrip()
-    return np.asarray(list(map(lambda x: float(x), list(filter(None, str_in.split(','))))))
+def arr_str(str_in, out=None):
+    """ convert string such as '2.3, 5.4, 9.9' to an array of floats """
+    return _parse_numbers(str_in, float, out)
+
+
+def arr_bytes(bytes_in, out=None):
+    """ convert array of bytes such as b'1,0\r' to an array of ints """
+    return _parse_numbers(bytes_in, int, out)
+
+
+def arr_bytes_floats(bytes_in, out=None):
+    """ convert array of bytes such as b'-3.051776e-004,-3.051776e-004,\r', to an array of floats """
+    return _parse_numbers(bytes_in, float, out)
+
+
+def ieee_block(block, dtype='>f4'):
+    """ decode an IEEE 488.2 binary block such as b'#18<8 data bytes>\n' (#, number of length digits,
+    length in bytes, data). An indefinite length block (#0) runs to the end (less a newline).
+    Returns a read-only numpy view of the data (no copy).
+
+    Parameters
+    ----------
+    block : bytes
+        the raw response (see comm_handle.read_raw)
+    dtype : str or numpy dtype, optional
+        with byte order, e.g. '>f4' for big-endian (SCPI FORM:BORD NORM) or '<f8' (FORM:BORD SWAP)
+
+    Returns
+    ----------
+    np.array
+    """
+    if isinstance(block, str):  # e.g. a decoded query
+        block = block.encode('latin-1')
+    start = block.find(b'#')
+    if start < 0:
+        raise ValueError('not an IEEE 488.2 binary block: {}'.format(bytes(block[:20])))
+    num_digits = int(block[start + 1:start + 2])
+    offset = start + 2 + num_digits
+    if num_digits == 0:
+        length = len(block) - offset - block.endswith(b'\n')
+    else:
+        length = int(block[start + 2:offset])
+    dtype = np.dtype(dtype)
+    return np.frombuffer(block, dtype=dtype, count=length // dtype.itemsize, offset=offset)
 
 
 def str_strip(str_in):
@@ -81,6 +130,14 @@ def returns_array(func):
     func.returns_array = True
     return func
 
+def binary_block(dtype):
+    """ getter conversion for an IEEE 488.2 binary block of dtype. The binary attribute has
+    get read the response with comm_handle.read_raw (no decoding to str) """
+    func = returns_array(functools.partial(ieee_block, dtype=dtype))
+    func.binary = True
+    return func
+
+
 nop = lambda x: x
 
 convert_return['str'] = str_strip
@@ -89,17 +146,23 @@ convert_return['byte_array_to_numarray'] = returns_array(arr_bytes)
 convert_return['byte_array_to_numarray_floats'] = returns_array(arr_bytes_floats)
 convert_return['keysight_error'] = keysight_error
 convert_return['pass'] = nop
+# IEEE 488.2 binary blocks: big-endian (FORM:BORD NORM, the SCPI default) and little-endian (_le, FORM:BORD SWAP)
+for name, dtype in [('f32', 'f4'), ('f64', 'f8'), ('i8', 'i1'), ('u8', 'u1'),
+                    ('i16', 'i2'), ('u16', 'u2'), ('i32', 'i4')]:
+    convert_return['ieee_block_' + name] = binary_block('>' + dtype)
+    convert_return['ieee_block_' + name + '_le'] = binary_block('<' + dtype)
 convert_return['pass_array'] = returns_array(nop)
 
 # getter conversion function to determine if a single bit is set. Returns True or False
+#   (bit=i binds the bit number when each function is made)
 for i in range(8):
     convert_return['bit{}_set'.format(
-        i)] = lambda x: bool(functools.partial(utils.get_bit, bit=i)(int(x)))
+        i)] = lambda x, bit=i: bool(utils.get_bit(int(x), bit=bit))
 # getter conversion function to determine if a single bit is cleared. Returns True or False
 for i in range(8):
     convert_return['bit{}_cleared'.format(
         i
-    )] = lambda x: not bool(functools.partial(utils.get_bit, bit=i)(int(x)))
+    )] = lambda x, bit=i: not bool(utils.get_bit(int(x), bit=bit))
 #### -----------------------------------------
 divider_string = '='*80 + '\n'
 getter_debug_value = '7'  # when running headless (no instruments attached) all getters return this arbitrary value
@@ -112,6 +175,7 @@ class SCPI(object):
     ----------
     cmd_list : Command
         A list of commands. Each command is an object of the class Command
+        (or a CommandTable, which builds each command when it is first used)
     comm_handle : Communication object
         handle to the (general) hardware interface
         Example is the pyvisa instrument object: inst
@@ -136,6 +200,21 @@ class SCPI(object):
         name the user assigns 
     comm_handle : object 
         the communication object (could be from pyvisa or pyserial)
+    cmd_separator : str
+        joins setter strings into one compound command (class attribute, ';' for SCPI)
+    cmd_root : str
+        prefixed to each joined command that does not start with it or '*', so SCPI headers
+        are not interpreted relative to the previous command (class attribute, ':' for SCPI)
+    max_write_length : int
+        the longest compound command sent in one write (the instrument input-buffer limit)
+    response_separator : str
+        splits the response to a compound query (class attribute, ';' for SCPI)
+    compound_query : bool
+        if False get_many sends one query per value (class attribute)
+    chunk_seconds : float
+        the time that each read of iter_chunks aims for (class attribute)
+    cache_reset_cmds : tuple (of str)
+        command names or headers that clear the state cache (class attribute)
 
     Methods
     ----------
@@ -145,6 +224,30 @@ class SCPI(object):
     set(name, value=None, configs={}) : 
         set a value for the command of name 
 
+    get_many(names, configs=None) :
+        get several values with compound queries
+
+    iter_chunks(name, total, chunk=1024, start=0, out=None, configs=None) :
+        read a large buffer in pieces
+
+    enable_stats(enable=True) :
+        record per-command latency histograms of get and set
+
+    stats() :
+        the recorded latency statistics
+
+    enable_cache(enable=True) :
+        remember configuration values that are set or read
+
+    refresh() :
+        re-read the remembered configuration values
+
+    set_many(settings) :
+        set several values with as few writes as possible
+
+    batch() :
+        context manager that collects sets and sends them as compound commands
+
     list_cmds() : 
         print all cmds
 
@@ -157,23 +260,45 @@ class SCPI(object):
     log_all_getters(filename=None, suppress_stdout=False):
         write all values that can be read to a file or to stdout
 
-    test_command(name, set_vals=None, get_configs={}, set_configs={}): 
-        test a specific command by sending a value and checking the readback of that value 
+    test_command(name, set_vals=None, get_configs={}, set_configs={}, check_errors=True):
+        test a specific command by sending a value and checking the readback of that value
 
     test_all(skip_subsystem=['setup', 'status', 'system'],
-                 skip_commands=['fast_transfer', 'reset']) : 
+                 skip_commands=['fast_transfer', 'reset'], deferred_errors=False, batch_size=16) :
         test all commands 
 
+    drain_comm_err(max_reads=32) :
+        read the instrument error flag until it is clear
+
     """
 
+    cmd_separator = ';'
+    cmd_root = ':'
+    max_write_length = 256
+    response_separator = ';'
+    compound_query = True
+    chunk_seconds = 0.5
+    cache_reset_cmds = ('reset', 'recall_setup', 'preset', '*RST', '*RCL')
+
     def __init__(self,
                  cmd_list,
                  comm_handle,
                  name='not named',
                  unconnected=False):
-        self._cmds = {}
-        for cmd in cmd_list:
-            self._cmds[cmd.name] = cmd
+        self._batch = None  # list of setter strings while in a batch()
+        self._batch_cache = {}  # state cache values of the queued sets, stored once they are written
+        self._state_cache = None  # dict of configuration values when enabled
+        self._stats = None  # stats.Stats when enabled
+        self._stats_data = None  # stats.Stats once enabled (kept when disabled)
+        # held by AsyncSCPI and Rack while they use the instrument, so that their calls
+        #   from different threads do not interleave
+        self._io_lock = threading.Lock()
+        if isinstance(cmd_list, CommandTable):
+            self._cmds = cmd_list  # commands are built on first use
+        else:
+            self._cmds = {}
+            for cmd in cmd_list:
+                self._cmds[cmd.name] = cmd
         self._write = comm_handle.write
         try:
             self._ask = comm_handle.query
@@ -202,41 +327,259 @@ class SCPI(object):
 
     def get(self, name, configs={}):
 
-        if not self._cmds[name].getter:
+        cmd = self._cmds[name]
+        # the common case: no stats, state cache or batch and a getter that returns text
+        if self._stats is None and self._state_cache is None and not self._batch \
+                and cmd.getter and cmd.getter_override is None and not cmd.binary_get:
+            ret_val = self._ask(cmd.format_get(configs))
+            if not (self.unconnected or cmd.has_lookup):
+                try:
+                    return cmd.getter_type(ret_val)
+                except ValueError:
+                    pass  # _convert_get prints the warning
+            return self._convert_get(cmd, ret_val)
+
+        # times each phase in the stats (None when enable_stats is off)
+        timer = None if self._stats is None else self._stats.timer(name)
+        if not cmd.getter:
             print('This command {} is not a getter'.format(name))
             raise NotImplementedError
 
-        if self._cmds[name].getter_override is not None:
-            return self._cmds[name].getter_override(**configs)
-
-        cmd_str = self._cmds[name].ascii_str_get
-        ret_val = self._ask(cmd_str.format(**configs))
+        if cmd.getter_override is not None:
+            val = cmd.getter_override(**configs)
+            if timer is not None:
+                timer.done()
+            return val
 
+        cache_key = self._cache_key(cmd, configs)
+        if cache_key is not None:
+            if cache_key in self._batch_cache:
+                self._flush_batch()  # a set of this value is queued
+            if cache_key in self._state_cache:
+                if timer is not None:
+                    timer.done()
+                return self._state_cache[cache_key]
+
+        # queued sets go out first so the get sees them
+        if self._batch:
+            self._flush_batch()
+
+        if timer is None:
+            val = self._convert_get(cmd, self._query(cmd, cmd.format_get(configs)))
+        else:
+            timer.mark()
+            query = cmd.format_get(configs)
+            timer.phase('format')
+            ret_val = self._query(cmd, query)
+            timer.phase('transport')
+            val = self._convert_get(cmd, ret_val, lookup=False)
+            timer.phase('convert')
+            if val is not None:
+                val = self._lookup_name(cmd, val)
+            timer.phase('lookup')
+        self._cache_store(cache_key, val)
+        if timer is not None:
+            timer.done()
+        return val
+
+    def _query(self, cmd, query):
+        """ send a query; the response of a binary getter is read as raw bytes """
+        if cmd.binary_get and not self.unconnected:
+            self.comm_handle.write(query)
+            return self.comm_handle.read_raw()
+        return self._ask(query)
+
+    def _convert_get(self, cmd, ret_val, lookup=True):
+        """ convert the string returned by the instrument with getter_type and the lookup table """
         # if the instrument is not connected, check if the command has a specific return value
         if self.unconnected:
             try:
-                ret_val = self._cmds[name]._unconnected_val
+                ret_val = cmd._unconnected_val
             except Exception as inst:
                 print(inst)
                 pass
         try:
-            val = self._cmds[name].getter_type(ret_val)
-            # check if a lookup table exists
-            if bool(self._cmds[name].lookup):  # bool(dict) --> checks if dictionary is empty
-                try:
-                    # check if this value matches a key in the lookup table
-                    val = list(self._cmds[name].lookup.keys())[list(
-                        self._cmds[name].lookup.values()).index(val)]
-                except ValueError:
-                    print('Warning: {} value of {} not in the lookup table'.
-                          format(name, val))
+            val = cmd.getter_type(ret_val)
+            if lookup:
+                val = self._lookup_name(cmd, val)
             return val
 
         except ValueError:
             print('Warning! getter {} returned unexpected type'.format(
-                self._cmds[name].name))
+                cmd.name))
             print('  Returned {}; with type = {}; expects = {}'.format(
-                ret_val, type(ret_val), self._cmds[name].getter_type))
+                ret_val, type(ret_val), cmd.getter_type))
+
+    @staticmethod
+    def _lookup_name(cmd, val):
+        """ map the instrument value back to its name in the lookup table (if one exists) """
+        if bool(cmd.lookup):  # bool(dict) --> checks if dictionary is empty
+            try:
+                val = cmd.lookup.name(val)
+            except KeyError:
+                print('Warning: {} value of {} not in the lookup table'.
+                      format(cmd.name, val))
+        return val
+
+    def get_many(self, names, configs=None):
+        """ get several values with compound queries (e.g. 'A?;B?;C?'), which
+        saves a round trip to the instrument for each value.
+
+        Commands with a getter_override or that return arrays/images are read with individual queries.
+        With enable_stats, each compound query is recorded under the name of every command it reads:
+        the whole round trip as 'transport' and that plus the conversion of the value as 'total'.
+
+        Parameters
+        ----------
+        names : list (of str)
+            names of the commands
+        configs : dict or list (of dicts), optional
+            configs for every command, or a list of configs, one for each name
+
+        Returns
+        ----------
+        list
+            the values in the order of names
+
+        Example
+        -------
+        vpp, vavg = osc.get_many(['meas_vpp', 'meas_vavg'], configs={'chan': 1})
+        """
+        if configs is None:
+            configs = {}
+        if isinstance(configs, dict):
+            configs = [configs] * len(names)
+
+        if self._batch:
+            self._flush_batch()
+
+        results = [None] * len(names)
+        individual = []
+        compound = []  # (index into results, command, query string)
+        for idx, (name, cfg) in enumerate(zip(names, configs)):
+            cmd = self._cmds[name]
+            if not cmd.getter:
+                print('This command {} is not a getter'.format(name))
+                raise NotImplementedError
+            if (not self.compound_query or cmd.getter_override is not None or cmd.returns_image
+                    or getattr(cmd.getter_type, 'returns_array', False)):
+                individual.append((idx, name, cfg))
+                continue
+            cache_key = self._cache_key(cmd, cfg)
+            if cache_key is not None and cache_key in self._state_cache:
+                results[idx] = self._state_cache[cache_key]
+            else:
+                compound.append((idx, cmd, cmd.format_get(cfg)))
+
+        start = 0
+        for group in self._join_commands([query for _, _, query in compound]):
+            queries = compound[start:start + len(group)]
+            start += len(group)
+
+            if self._stats is not None:
+                sent = time.perf_counter()
+            ret_val = self._ask(self.cmd_separator.join(group))
+            ret_vals = ret_val.split(self.response_separator) if isinstance(ret_val, str) else [ret_val]
+            if len(ret_vals) != len(queries):
+                if self.unconnected:
+                    ret_vals = [ret_val] * len(queries)
+                else:
+                    print('Warning: compound query returned {} values, expected {}; querying individually'.format(
+                        len(ret_vals), len(queries)))
+                    ret_vals = [self._ask(query) for _, _, query in queries]
+            if self._stats is not None:
+                round_trip = time.perf_counter() - sent
+            for (idx, cmd, _), val in zip(queries, ret_vals):
+                if self._stats is not None:
+                    converted = time.perf_counter()
+                results[idx] = self._convert_get(cmd, val)
+                self._cache_store(self._cache_key(cmd, configs[idx]), results[idx])
+                if self._stats is not None:
+                    self._stats.record(cmd.name, 'transport', round_trip)
+                    self._stats.record(cmd.name, 'total', round_trip + time.perf_counter() - converted)
+
+        for idx, name, cfg in individual:
+            results[idx] = self.get(name, cfg)
+
+        return results
+
+    def iter_chunks(self, name, total, chunk=1024, start=0, out=None, configs=None,
+                    start_key='start_pt', count_key='num_pts', adaptive=True):
+        """ read a large instrument buffer in pieces: a generator that yields numpy chunks as they arrive.
+        The getter must take the first point and the number of points as configs
+        (e.g. SR810 read_buffer: 'TRCA? {start_pt}, {num_pts}').
+
+        With adaptive, the chunk size follows the measured throughput so that each read takes about
+        chunk_seconds, and no more than a quarter of the transport timeout.
+
+        Parameters
+        ----------
+        name : str
+            name of the getter
+        total : int
+            number of points to read
+        chunk : int, optional
+            number of points in the first read (in every read if not adaptive)
+        start : int, optional
+            the first point
+        out : np.array, optional
+            filled with the points; the chunks yielded are views into out
+        configs : dict, optional
+            other configs of the getter
+        start_key, count_key : str, optional
+            names of the configs for the first point and the number of points
+        adaptive : bool, optional
+
+        Yields
+        ----------
+        np.array
+
+        Example
+        -------
+        data = np.empty(n)
+        for c in lia.iter_chunks('read_buffer', total=n, out=data):
+            print('{} points'.format(len(c)))
+        """
+        configs = dict(configs or {})
+        timeout = self._transport_timeout()
+        target = self.chunk_seconds if timeout is None else min(self.chunk_seconds, timeout / 4)
+        pos = 0
+        while pos < total:
+            count = max(1, min(int(chunk), total - pos))
+            configs[start_key] = start + pos
+            configs[count_key] = count
+            t = time.perf_counter()
+            vals = self.get(name, configs)
+            elapsed = time.perf_counter() - t
+            if vals is None or np.size(vals) == 0:
+                print('Warning: {} returned no data at point {}; stopping'.format(name, start + pos))
+                return
+            received = np.size(vals)
+            if received > count:
+                print('Error: {} returned {} points at point {}; requested {}'.format(
+                    name, received, start + pos, count))
+                raise ValueError
+            # a short read is continued by the next read
+            if out is not None:
+                out[pos:pos + received] = vals
+                vals = out[pos:pos + received]
+            pos += received
+            yield vals
+            if adaptive and elapsed > 0:
+                # grow by at most 4x a read, since the first reads include fixed overhead
+                chunk = min(received * target / elapsed, received * 4)
+
+    def _transport_timeout(self):
+        """ the timeout of the communication handle in seconds; None if unknown or unlimited """
+        comm = getattr(self, 'comm_handle', None)
+        timeout = getattr(comm, 'timeout', None)  # pyvisa, in ms
+        if timeout is not None:
+            timeout = timeout / 1000
+        else:
+            timeout = getattr(getattr(comm, 'ser', None), 'timeout', None)  # pyserial, in s
+        if timeout is None or timeout == float('inf') or timeout <= 0:
+            return None
+        return timeout
 
     def set(self, name, value=None, configs={}):
         """ set a value 
@@ -254,31 +597,269 @@ class SCPI(object):
         ----------
         str 
             .. todo:: check this and fix? 
+            None if the set is queued by a batch()
 
         """
-        cmd_str = self._cmds[name].ascii_str
+        cmd = self._cmds[name]
+        # the common case: no stats, state cache or batch
+        if self._stats is None and self._state_cache is None and self._batch is None:
+            return self._write(self._set_str(cmd, value, configs))
+
+        # times each phase in the stats (None when enable_stats is off)
+        timer = None if self._stats is None else self._stats.timer(name)
+        cache_key = None
+        if self._state_cache is not None:
+            unchanged, cache_key, expected = self._cache_on_set(cmd, value, configs)
+            if unchanged:
+                if timer is not None:
+                    timer.done()
+                return  # the instrument already has this value
 
+        try:
+            cmd_str = self._set_str(cmd, value, configs)
+            if timer is not None:
+                timer.phase('format')
+
+            if self._batch is not None:
+                self._batch.append(cmd_str)
+                if cache_key is not None:
+                    self._batch_cache[cache_key] = expected
+                if timer is not None:
+                    timer.done()
+                return
+
+            # send the command to the instrument
+            ret = self._write(cmd_str)
+        except Exception:
+            # the instrument may or may not have the value
+            if cache_key is not None:
+                self._state_cache.pop(cache_key, None)
+            raise
+        if cache_key is not None:
+            self._state_cache[cache_key] = expected
+        if timer is not None:
+            timer.phase('transport')
+            timer.done()
+        return ret
+
+    def _set_str(self, cmd, value=None, configs={}):
+        """ the string sent on set of the Command cmd; runs the lookup and range check """
         if value is not None:
             # check if this value is a key in the lookup table
-            if value in self._cmds[name].lookup:
-                try:
-                    value = self._cmds[name].lookup[value]
-                except Exception as set_error:
-                    pass  # just keep value
+            if cmd.has_lookup and value in cmd.lookup:
+                value = cmd.lookup[value]
 
-            self.check_set_range(value, name)
-            cmd_str = cmd_str.format(value=value, **configs)
+            # the same check as check_set_range
+            if not cmd.in_range(value):
+                self.out_of_range_warning(value, cmd.name)
+            cmd_str = cmd.format_set(value, configs)
 
         # allow for a setter with no value (e.g. '*RST')
         else:  # is the value is None
-            cmd_str = cmd_str.format(value='').rstrip()
+            cmd_str = cmd.format_set('', {}).rstrip()
 
         # for pytests 
         if self.unconnected:
-            self._cmds[name]._unconnected_val = value
+            cmd._unconnected_val = value
+
+        return cmd_str
+
+    def enable_stats(self, enable=True):
+        """ turn on (or off) the latency statistics of get and set. Each command name
+        has a count and a histogram of the time spent in each phase (format, transport,
+        convert, lookup and total); see the stats module. When off, get and set do not read the clock.
+        Enabling again keeps the counts; use stats().reset() to clear them.
+
+        Parameters
+        ----------
+        enable : bool, optional
+        """
+        if enable and self._stats_data is None:
+            from instrbuilder.stats import Stats
+            self._stats_data = Stats()
+        self._stats = self._stats_data if enable else None
+
+    def stats(self):
+        """ the latency statistics (stats.Stats) collected since enable_stats; None if never enabled
+
+        Example
+        -------
+        dmm.enable_stats()
+        ...
+        print(dmm.stats().slowest(5))
+        dmm.stats().dump('dmm_stats.json')
+        """
+        return self._stats_data
+
+    def enable_cache(self, enable=True):
+        """ turn on (or off) the state cache of configuration values.
+
+        With the cache on, commands with is_config that are both getter and setter remember
+        the last value set or read: a get returns the remembered value without a query, and a set
+        of an unchanged value is not sent. The cache is cleared by reset / recall commands
+        (see cache_reset_cmds); use refresh() to re-read the values from the instrument.
+
+        Parameters
+        ----------
+        enable : bool, optional
+        """
+        self._state_cache = {} if enable else None
 
-        # send the command to the instrument
-        return self._write(cmd_str)
+    def refresh(self):
+        """ re-read all cached values from the instrument
+
+        Returns
+        ----------
+        dict
+            keys are (name, configs) tuples, values are the values read
+        """
+        if self._state_cache is None:
+            return {}
+        keys = list(self._state_cache)
+        self._state_cache.clear()
+        self.get_many([name for name, _ in keys], [dict(cfg) for name, cfg in keys])
+        return dict(self._state_cache)
+
+    def _cache_key(self, cmd, configs):
+        """ the state cache key of a command with configs; None if the value is not cached """
+        if self._state_cache is None:
+            return None
+        if not (cmd.is_config and cmd.getter and cmd.setter) or (cmd.getter_override is not None) \
+                or cmd.returns_image or getattr(cmd.getter_type, 'returns_array', False):
+            return None
+        try:
+            key = (cmd.name, tuple((k, configs[k]) for k in cmd.get_config_keys))
+            hash(key)
+        except (KeyError, TypeError):
+            return None
+        return key
+
+    def _cache_store(self, key, value):
+        if key is not None and value is not None:
+            self._state_cache[key] = value
+
+    def _cache_on_set(self, cmd, value, configs):
+        """ check the state cache for a set. Returns (unchanged, key, expected): unchanged is True if
+        the instrument already has the value; otherwise, if key is not None, the set stores expected
+        in the cache once it is written. """
+        cache = self._state_cache
+        if cmd.name in self.cache_reset_cmds or cmd.ascii_str.split(' ')[0] in self.cache_reset_cmds:
+            cache.clear()
+            self._batch_cache.clear()
+            return False, None, None
+        key = self._cache_key(cmd, configs)
+        if key is None or value is None:
+            return False, None, None
+        try:
+            # the value as get would return it
+            raw = cmd.lookup[value] if value in cmd.lookup else value
+            expected = cmd.getter_type(raw)
+            names = cmd.lookup.names(expected)
+            if names:
+                expected = names[0]
+            # a setter with configs that the getter does not have, or an out of range value
+            #   (which the instrument may clip) does not tell us what a get would return
+            known = set(cmd.set_config_keys) <= set(cmd.get_config_keys) and cmd.in_range(raw)
+        except Exception:
+            known = False
+        if not known:
+            cache.pop(key, None)
+            self._batch_cache.pop(key, None)
+            return False, None, None
+        # a queued set is what the instrument will have
+        current = self._batch_cache if key in self._batch_cache else cache
+        unchanged = (key in current) and bool(current[key] == expected)
+        return unchanged, key, expected
+
+    def set_many(self, settings):
+        """ set several values, joined into as few compound commands (writes) as possible.
+        The lookup and range check run for each element as with set.
+
+        Parameters
+        ----------
+        settings : dict or list
+            {name: value} or a list of (name, value) or (name, value, configs) tuples
+
+        Returns
+        ----------
+        list
+            the return of each write; empty if called within an outer batch()
+
+        Example
+        -------
+        dmm.set_many([('volt_aperture', 20e-6), ('trig_source', 'EXT'), ('volt_range', 10, {'ac_dc': 'DC'})])
+        """
+        if isinstance(settings, dict):
+            settings = settings.items()
+        outer = self._batch is None
+        with self.batch():
+            for setting in settings:
+                self.set(*setting)
+            if outer:
+                return self._flush_batch()
+        return []
+
+    @contextlib.contextmanager
+    def batch(self):
+        """ collect sets and send them as compound commands when the block exits
+        (or before a get, so that reads see the new values).
+
+        Example
+        -------
+        with lia.batch():
+            lia.set('freq', 5000)
+            lia.set('tau', 8)
+        """
+        if self._batch is not None:  # nested, the outer batch sends
+            yield self
+            return
+        self._batch = []
+        try:
+            yield self
+        finally:
+            # sent even on an exception: unbatched, these sets would already be at the instrument
+            try:
+                self._flush_batch()
+            finally:
+                self._batch = None
+
+    def _flush_batch(self):
+        """ write the queued setter strings; the state cache is updated once all are written """
+        pending, cache_updates = self._batch, self._batch_cache
+        self._batch = []
+        self._batch_cache = {}
+        try:
+            rets = [self._write(self.cmd_separator.join(group)) for group in self._join_commands(pending)]
+        except Exception:
+            if self._state_cache is not None:
+                for key in cache_updates:
+                    self._state_cache.pop(key, None)
+            raise
+        if self._state_cache is not None:
+            self._state_cache.update(cache_updates)
+        return rets
+
+    def _join_commands(self, cmd_strs):
+        """ group command strings so that each group joined by cmd_separator
+        is no longer than max_write_length. Returns a list of lists of strings. """
+        sep_len = len(self.cmd_separator)
+        root = self.cmd_root
+        groups = []
+        length = 0
+        for cmd_str in cmd_strs:
+            if not groups:
+                groups.append([cmd_str])
+                length = len(cmd_str)
+                continue
+            if root and not cmd_str.startswith((root, '*')):
+                cmd_str = root + cmd_str
+            if length + sep_len + len(cmd_str) > self.max_write_length:
+                groups.append([cmd_str])
+                length = len(cmd_str)
+            else:
+                groups[-1].append(cmd_str)
+                length += sep_len + len(cmd_str)
+        return groups
 
     def check_set_range(self, value, name):
         """ check if the value to be set is within range 
@@ -296,27 +877,17 @@ class SCPI(object):
             True if in range 
 
         """
-        if self._cmds[name].limits is None:
+        cmd = self._cmds[name]
+        if cmd.limits is None:
             return True
 
-        if (len(self._cmds[name].limits) == 2) and (type(
-                self._cmds[name].limits[0]) is not str):
-            # numeric, check if less than or greater than
-            if (value >= self._cmds[name].limits[0]) and (
-                    value <= self._cmds[name].limits[1]):
-                return True
-            else:
-                # throw out of range warning
-                self.out_of_range_warning(value, name)
-                return False
+        # the validator is built from the limits when the command is created
+        if cmd.in_range(value):
+            return True
         else:
-            # check if value is a member
-            if value in self._cmds[name].limits:
-                return True
-            else:
-                # throw out of range warning
-                self.out_of_range_warning(value, name)
-                return False
+            # throw out of range warning
+            self.out_of_range_warning(value, name)
+            return False
 
 
     def out_of_range_warning(self, value, name):
@@ -356,6 +927,7 @@ class SCPI(object):
             name of the command (first column in the csv file)
 
         """
+        import colorama
         if subsystem_list is None:
             # get all subsystems
             subsystems = [self._cmds[d].subsystem for d in self._cmds]
@@ -385,6 +957,7 @@ class SCPI(object):
             the name of the command
 
         """
+        import colorama
         if self._cmds[name].subsystem is not None:
             sub_sys = ' in subsystem: {}'.format(self._cmds[name].subsystem)
         else:
@@ -471,8 +1044,60 @@ class SCPI(object):
             )
             sys.exit()
 
+    def drain_comm_err(self, max_reads=32):
+        """ Read the error flag until it is clear. An error queue (e.g. SYST:ERR?) returns one
+            error per read; an event register (e.g. *ESR?) is cleared by the first read.
+
+        Parameters
+        ----------
+        max_reads : int, optional
+            the most reads (the size of the instrument error queue)
+
+        Returns
+        ----------
+        bool
+            if True a comm error was detected
+
+        """
+        comm_error = False
+        for i in range(max_reads):
+            if not self.read_comm_err():
+                break
+            comm_error = True
+        return comm_error
+
+    def _bisect_errors(self, names, run):
+        """ find the commands that flag an instrument error. The tests (run(name)) of names together
+            flagged an error; each half is run again and the halves that error are split further.
+
+        Returns
+        ----------
+        list
+            names that flag an error on their own
+        """
+        if len(names) == 1:
+            return list(names)
+        half = len(names) // 2
+        failing = []
+        for part in (names[:half], names[half:]):
+            for name in part:
+                run(name)
+            if self.drain_comm_err():
+                failing += self._bisect_errors(part, run)
+        return failing
+
+    @contextlib.contextmanager
+    def _cache_suspended(self):
+        """ bypass the state cache; the cache is cleared after since values may have changed """
+        cache, self._state_cache = self._state_cache, None
+        try:
+            yield
+        finally:
+            cache.clear()
+            self._state_cache = cache
+
     def test_command(self, name, set_vals=None, get_configs={},
-                     set_configs={}):
+                     set_configs={}, check_errors=True):
         """ Test a command by setting and getting to determine if: 
             1) the instrument reports a communcation error
             2) the return value is of an unexpected type or an error threshold away from what was set
@@ -488,6 +1113,9 @@ class SCPI(object):
                 A dictionary of configs to send the get command
             set_configs : dict, optional
                 A dictionary of configs to send the set command
+            check_errors : bool, optional
+                if False the instrument error flag is not read; only the readback is checked
+                (used by test_all with deferred_errors)
 
             Returns
             -------
@@ -500,6 +1128,11 @@ class SCPI(object):
 
         """
 
+        if self._state_cache is not None:
+            # tests must read back from the instrument
+            with self._cache_suspended():
+                return self.test_command(name, set_vals, get_configs, set_configs, check_errors)
+
         comm_error = False
         allowed_err = 0.02  # .. todo:: determine error magnitude that is allowed for automated checking
 
@@ -516,7 +1149,8 @@ class SCPI(object):
         if (self._cmds[name].getter and self._cmds[name].setter):
 
             ret = self.get(name, configs=get_configs)
-            comm_error |= self.read_comm_err()
+            if check_errors:
+                comm_error |= self.read_comm_err()
             if set_vals is None:
                 try:
                     set_vals = [
@@ -530,7 +1164,8 @@ class SCPI(object):
 
             for set_val in set_vals:
                 self.set(name, set_val, configs=set_configs)
-                comm_error |= self.read_comm_err()
+                if check_errors:
+                    comm_error |= self.read_comm_err()
                 ret = self.get(name, configs=get_configs)
                 # if present remove lookup table modification
                 try:
@@ -538,7 +1173,8 @@ class SCPI(object):
                 except:
                     pass
 
-                comm_error |= self.read_comm_err()
+                if check_errors:
+                    comm_error |= self.read_comm_err()
                 if self._cmds[name].getter_type == float:
                     try:
                         deviates = np.abs(
@@ -566,7 +1202,8 @@ class SCPI(object):
             if (self._cmds[name].limits) is None:
                 set_val = None
                 self.set(name, set_val, configs=set_configs)
-                comm_error |= self.read_comm_err()
+                if check_errors:
+                    comm_error |= self.read_comm_err()
 
             elif (len(self._cmds[name].limits) > 2):
                 set_vals = [
@@ -574,7 +1211,8 @@ class SCPI(object):
                 ]
                 for set_val in set_vals:
                     self.set(name, set_val, configs=set_configs)
-                    comm_error |= self.read_comm_err()
+                    if check_errors:
+                        comm_error |= self.read_comm_err()
             else:
                 print('Skipping test of setter {}'.format(name))
                 return 'NotTested'
@@ -582,7 +1220,8 @@ class SCPI(object):
         # if getter only
         elif self._cmds[name].getter:
             ret = self.get(name, configs=get_configs)
-            comm_error |= self.read_comm_err()
+            if check_errors:
+                comm_error |= self.read_comm_err()
 
         else:
             print('Command is not a setter nor a getter, cannot test!')
@@ -591,7 +1230,9 @@ class SCPI(object):
 
     def test_all(self,
                  skip_subsystem=['setup', 'status', 'system'],
-                 skip_commands=['fast_transfer', 'reset']):
+                 skip_commands=['fast_transfer', 'reset'],
+                 deferred_errors=False,
+                 batch_size=16):
         """ Test all commands by setting and getting to determine if: 
             1) the instrument reports a communcation error
             2) the return value is of an unexpected type or an error threshold away from what was set
@@ -604,6 +1245,12 @@ class SCPI(object):
                 that reset the instrument 
             skip_commands : list (of strings), default = ['fast_transfer', 'reset']
                 Commands to skip
+            deferred_errors : bool, default = False
+                if True the error flag is read once per batch of commands rather than after each get and set.
+                When a batch flags an error the batch is bisected (the tests are run again) to find
+                the commands that caused it.
+            batch_size : int, default = 16
+                number of commands tested between error reads when deferred_errors is True
 
             Returns
             -------
@@ -612,15 +1259,35 @@ class SCPI(object):
 
         """
         all_tests = {}
-        for key in self._cmds:
-            if (self._cmds[key].subsystem in skip_subsystem) or (
-                    key in skip_commands):
-                pass
-            else:
+        keys = [key for key in self._cmds
+                if not ((self._cmds[key].subsystem in skip_subsystem) or (key in skip_commands))]
+
+        if not deferred_errors:
+            for key in keys:
                 print('Testing {}'.format(key))
                 status = self.test_command(key)
                 all_tests[key] = status
                 print('Result for {} = {}'.format(key, status))
+        else:
+            def run(key):
+                return self.test_command(key, check_errors=False)
+
+            self.drain_comm_err()  # errors from before the test
+            for start in range(0, len(keys), batch_size):
+                batch = keys[start:start + batch_size]
+                for key in batch:
+                    print('Testing {}'.format(key))
+                    all_tests[key] = run(key)
+                tested = [key for key in batch if all_tests[key] != 'NotTested']
+                if tested and self.drain_comm_err():
+                    failing = self._bisect_errors(tested, run)
+                    if not failing:
+                        print('Warning: error in batch {} was not repeated; marking the batch as failed'.format(tested))
+                        failing = tested
+                    for key in failing:
+                        all_tests[key] = False
+                for key in batch:
+                    print('Result for {} = {}'.format(key, all_tests[key]))
 
         #### ---- Print and return results -----
         print('\n')
@@ -632,6 +1299,62 @@ class SCPI(object):
         return all_tests
 
 
+# VISA resource managers shared by the process (one per backend); creating a resource manager
+#   loads the VISA library and listing the resources enumerates the bus, which are both slow
+RESOURCE_LIST_TTL = 10.0  # seconds that a resource listing is reused
+_resource_managers = {}
+_resource_listings = {}  # {(backend, query): (time, resources)}
+_visa_lock = threading.Lock()
+_VI_SUCCESS = 0  # pyvisa.constants.StatusCode.success (without importing pyvisa on each write)
+
+
+def resource_manager(backend=''):
+    """ the shared pyvisa ResourceManager of a backend (created on first use)
+
+    Parameters
+    ----------
+    backend : str, optional
+        the pyvisa backend (e.g. '@py'); the default is the pyvisa default
+
+    Returns
+    ----------
+    pyvisa.ResourceManager
+    """
+    with _visa_lock:
+        try:
+            return _resource_managers[backend]
+        except KeyError:
+            import pyvisa as visa
+            mgr = _resource_managers[backend] = visa.ResourceManager(backend)
+            return mgr
+
+
+def list_resources(ttl=RESOURCE_LIST_TTL, backend='', query='?*::INSTR'):
+    """ the VISA resources (addresses); a listing made less than ttl seconds ago is reused
+
+    Parameters
+    ----------
+    ttl : float, optional
+        maximum age (seconds) of a reused listing; 0 always enumerates the bus
+    backend : str, optional
+        the pyvisa backend
+    query : str, optional
+        the VISA resource expression
+
+    Returns
+    ----------
+    tuple
+        the addresses of the resources
+    """
+    key = (backend, query)
+    listing = _resource_listings.get(key)
+    if listing is not None and time.monotonic() - listing[0] < ttl:
+        return listing[1]
+    resources = tuple(resource_manager(backend).list_resources(query))
+    _resource_listings[key] = (time.monotonic(), resources)
+    return resources
+
+
 class PyVisaUSB(object):
     """A USBPyVISA instrument (connected via a USB cable)
 
@@ -670,24 +1393,20 @@ class PyVisaUSB(object):
            * enable or disable of lookup table   
         
         """
-
-        mgr = visa.ResourceManager()
-        resources = mgr.list_resources()
-        if addr in resources:
-            # open device  .. todo:: check return value
-            obj = mgr.open_resource(addr)
-        elif addr not in resources:
-            print(
-                'Trying to open the device even though it was not found by the resource manager'
-            )
-            obj = mgr.open_resource(addr)
-        else:
-            print(
-                'This address {} was not recognized'.format(addr),
-                file=sys.stderr)
-            print('Returning an empty handle', file=sys.stderr)
-            obj = None
-        return obj
+        mgr = resource_manager()
+        try:
+            # the bus is only enumerated (list_resources) if the open fails
+            return mgr.open_resource(addr)
+        except Exception:
+            try:
+                resources = list_resources(ttl=0)
+            except Exception:
+                resources = ()
+            if addr not in resources:
+                print('The address {} was not found by the resource manager'.format(addr),
+                      file=sys.stderr)
+                print('Found: {}'.format(', '.join(resources)), file=sys.stderr)
+            raise
 
     def ask(self, cmd):
         """ Send a query to the instrument 
@@ -723,7 +1442,7 @@ class PyVisaUSB(object):
         
         """
         ret = self.comm.write(cmd)
-        return ret[1] == StatusCode.success, ret
+        return ret[1] == _VI_SUCCESS, ret
 
     def close(self):
         pass
@@ -754,6 +1473,7 @@ class Serial(object):
 
     """
     def __init__(self, ser_port, **kwargs):
+        import serial
         self.ser = serial.Serial(
             port=ser_port,
             baudrate=kwargs.get('baudrate', 9600),
@@ -792,6 +1512,19 @@ class Serial(object):
         return (True,
                 'no-details')  # pyserial does not return a success upon write
 
+    def read_raw(self):
+        """ read a response as bytes. A definite length binary block (#<n><length><data>)
+        is read in full even if the data includes the eol character """
+        first = self.ser.read(1)
+        if first != b'#':
+            return first + self._readline() if first else b''
+        num_digits = self.ser.read(1)
+        if num_digits == b'0':  # indefinite length, ends with the eol
+            return b'#0' + self._readline()
+        length = self.ser.read(int(num_digits))
+        data = self.ser.read(int(length))
+        return b'#' + num_digits + length + data + self._readline()
+
     def close(self):
         self.ser.close()
 
@@ -811,7 +1544,55 @@ class Serial(object):
         return bytes(line)
 
 
-def init_instrument(cmd_map, addr, lookup=None, **kwargs):
+class Comm(object):
+    """Stand-in communication object for an unconnected instrument.
+    Commands are printed to stdout and queries return getter_debug_value.
+
+    Parameters
+    ----------
+    latency : float, optional
+        seconds to wait on each write and query, to mimic the round trip to an instrument
+    echo : bool, optional
+        print the commands to stdout
+
+    """
+    def __init__(self, latency=0.0, echo=True):
+        self.latency = latency
+        self.echo = echo
+
+    def write(self, str_input):
+        if self.latency:
+            time.sleep(self.latency)
+        if self.echo:
+            print(str_input)
+
+    def query(self, str_input):
+        self.write(str_input)
+        return getter_debug_value
+
+
+def command_from_definition(row):
+    """ build a Command from a row of keyword arguments (see definitions.read_definitions) """
+    kwargs = dict(row)
+    kwargs['getter_type'] = convert_return[row['getter_type']]
+    kwargs['setter_type'] = convert_return[row['setter_type']]
+    if isinstance(row['limits'], list):
+        # Command converts the limits through the lookup table in place
+        kwargs['limits'] = list(row['limits'])
+    return Command(**kwargs)
+
+
+def commands_from_definitions(rows, lazy=False):
+    """ build the Command objects from rows of keyword arguments (see definitions.read_definitions)
+
+    Returns a list of Commands, or a CommandTable that builds each Command on first use if lazy is True
+    """
+    if lazy:
+        return CommandTable(rows, factory=command_from_definition)
+    return [command_from_definition(row) for row in rows]
+
+
+def init_instrument(cmd_map, addr, lookup=None, use_cache=True, lazy=False, **kwargs):
     """
     initialize an instrument with its address and CSV file of commands 
 
@@ -823,10 +1604,14 @@ def init_instrument(cmd_map, addr, lookup=None, **kwargs):
         key is one of pyserial, pyvisa; value is the address of the instrument
     lookup : str, optional
         filename of the CSV file of lookup table
+    use_cache : bool, optional
+        use the on-disk cache of parsed definitions (see instrbuilder.definitions)
+    lazy : bool, optional
+        return a CommandTable that builds each Command when it is first used
 
     Returns
     ----------
-    list 
+    list (or CommandTable)
         list of commands that will be used for building the instrument
     object
         communication handle
@@ -835,113 +1620,8 @@ def init_instrument(cmd_map, addr, lookup=None, **kwargs):
     
     """
 
-    # Read CSV file of commands using Pandas
-    df = pd.read_csv(cmd_map)
-    # strip white space and end-of-line from column headers
-    df = df.rename(columns=lambda x: x.strip())
-    # strip white space and end-of-line from string inputs
-    df['setter_type'] = df['setter_type'].str.strip()
-    df['getter_type'] = df['getter_type'].str.strip()
-
-    # Read CSV file of lookups
-    if lookup:
-        df_look = pd.read_csv(lookup)
-        # strip white space and end-of-line from column headers
-        df_look = df_look.rename(columns=lambda x: x.strip())
-        # drop empty rows (for example, at the end)
-        df_look = df_look.dropna(how='all')
-
-        # make a dictionary for each command
-        cmd_lookups = {}
-        for index, row in df_look.iterrows():
-            if index == 0:
-                try:
-                    if math.isnan(row['command']):
-                        raise Exception(
-                            'The first element of the lookup table is empty')
-                except Exception as inst:
-                    pass
-            try:
-                if not math.isnan(row['command']):
-                    current_cmd = current_cmd  # shouldn't get here
-            except Exception as inst:
-                current_cmd = row['command']
-
-            try:
-                dict_key = float(row['name'])
-            except ValueError:
-                dict_key = str(row['name'])
-
-            if current_cmd in cmd_lookups.keys():
-                cmd_lookups[current_cmd][dict_key] = row['value']
-            else:
-                # initialize the dictionary
-                cmd_lookups[current_cmd] = {}
-                cmd_lookups[current_cmd][dict_key] = row['value']
-
-    cmd_list = []
-    for index, row in df.iterrows():
-        # convert getter, setter to Boolean True or False
-        for gs in ['getter', 'setter']:
-            if row[gs] in ['True', 'T', 'TRUE', 'true', True]:
-                tmp = True
-            elif row[gs] in ['False', 'F', 'FALSE', 'false', False]:
-                tmp = False
-            else:
-                tmp = False
-            row[gs] = tmp  # converts to Boolean
-
-        if row['setter_range'] is not None:
-            try:
-                row['setter_range'] = ast.literal_eval(row['setter_range'])
-            except ValueError:
-                if not math.isnan(row["setter_range"]):
-                    print(
-                        f'Warning setter_range of {colorama.Fore.GREEN}{row["setter_range"]}{colorama.Style.RESET_ALL} for command {colorama.Fore.BLUE}{row["name"]}{colorama.Style.RESET_ALL} not of proper form'
-                    )
-                row['setter_range'] = None
-
-        # pandas read default value is nan. Convert to None or 0 depending upon column
-        def modify_default(row_el, default_value):
-            try:
-                row_el = default_value if math.isnan(row_el) else row_el
-            except TypeError:
-                row_el = row_el
-            return row_el
-
-        row['setter_inputs'] = modify_default(row['setter_inputs'], 1)
-        row['getter_inputs'] = modify_default(row['getter_inputs'], 0)
-        row['ascii_str_get'] = modify_default(row['ascii_str_get'], None)
-        row['subsystem'] = modify_default(row['subsystem'], None)
-
-        if False:
-            print('---')
-            print(row['name'])
-            print(cmd_lookups.keys())
-            print('---')
-
-        if row['name'] in cmd_lookups.keys():
-            lookup_dict = cmd_lookups[row['name']]
-        else:
-            lookup_dict = {}
-
-        cmd = Command(
-            name=row['name'],
-            ascii_str=row['ascii_str'],
-            ascii_str_get=row['ascii_str_get'],
-            getter=row['getter'],
-            getter_type=convert_return[row['getter_type']],
-            setter=row['setter'],
-            setter_type=convert_return[row['setter_type']],
-            limits=row['setter_range'],
-            doc=row['doc'],
-            subsystem=row['subsystem'],
-            getter_inputs=row['getter_inputs'],
-            setter_inputs=row['setter_inputs'],
-            lookup=lookup_dict,
-            is_config=row['is_config'])
-
-        cmd_list.append(cmd)
+    rows = definitions.load_definitions(cmd_map, lookup, use_cache=use_cache)
+    cmd_list = commands_from_definitions(rows, lazy=lazy)
 
     # check to ensure the dictionary only has 0 or 1 entry
     if len(addr) > 1:
@@ -994,19 +1674,6 @@ def init_instrument(cmd_map, addr, lookup=None, **kwargs):
             format(getter_debug_value))
         print(divider_string)
 
-        class Comm():
-            pass
-
         inst_comm = Comm()
 
-        def ask(str_input):
-            print(str_input)
-            return getter_debug_value
-
-        def write(str_input):
-            print(str_input)
-
-        inst_comm.write = write
-        inst_comm.query = ask
-
     return cmd_list, inst_comm, unconnected
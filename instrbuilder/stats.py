@@ -0,0 +1,167 @@
+'''
+Per-command counters and latency histograms, used by SCPI.enable_stats(). Each command name
+has a histogram for each phase of a get or set:
+
+    format : building the command string (for a set this includes the lookup and range check)
+    transport : the write or query round trip to the instrument
+    convert : getter_type conversion of the returned string
+    lookup : mapping the converted value back to its name in the lookup table
+    total : the whole get or set (also recorded for getter_overrides and cache hits)
+
+A compound query of SCPI.get_many (also used by refresh, Rack.get and Rack.snapshot) records its round trip as
+the transport of each command it reads; values that get_many takes from the state cache are not recorded.
+'''
+
+# standard library imports
+import math
+import json
+import csv
+import time
+
+# histogram bins are powers of 2 in microseconds: bin k counts durations in [2**(k-1), 2**k) us
+#   bin 0 is < 1 us and the last bin is >= 2**(NUM_BINS-2) us (about 9 minutes)
+NUM_BINS = 31
+BIN_EDGES = [2**k * 1e-6 for k in range(NUM_BINS)]  # upper edges in seconds
+PHASES = ('format', 'transport', 'convert', 'lookup', 'total')
+
+
+class Histogram(object):
+    """count, sum, min, max and a log2 binned histogram of durations (seconds)"""
+
+    __slots__ = ('count', 'total', 'min', 'max', 'bins')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = 0.0
+        self.bins = [0] * NUM_BINS
+
+    def add(self, seconds):
+        self.count += 1
+        self.total += seconds
+        if seconds < self.min:
+            self.min = seconds
+        if seconds > self.max:
+            self.max = seconds
+        if seconds > 0:
+            k = math.frexp(seconds * 1e6)[1]
+            self.bins[min(max(k, 0), NUM_BINS - 1)] += 1
+        else:
+            self.bins[0] += 1
+
+    def summary(self):
+        return {'count': self.count,
+                'total': self.total,
+                'mean': self.total / self.count if self.count else 0.0,
+                'min': self.min if self.count else 0.0,
+                'max': self.max,
+                'hist': list(self.bins)}
+
+
+class Timer(object):
+    """times the phases of one get or set: phase(p) records the time since the previous
+    phase (or mark) and done() records the total since the timer was made"""
+
+    __slots__ = ('_record', 'name', 'start', 'last')
+
+    def __init__(self, stats, name):
+        self._record = stats.record
+        self.name = name
+        self.start = self.last = time.perf_counter()
+
+    def mark(self):
+        """ start the next phase now """
+        self.last = time.perf_counter()
+
+    def phase(self, phase):
+        t = time.perf_counter()
+        self._record(self.name, phase, t - self.last)
+        self.last = t
+
+    def done(self):
+        self._record(self.name, 'total', time.perf_counter() - self.start)
+
+
+class Stats(object):
+    """Latency histograms keyed by command name and phase
+
+    Methods
+    ----------
+    record(name, phase, seconds) :
+        add a duration
+
+    summary() :
+        {name: {phase: {count, total, mean, min, max, hist}}}
+
+    slowest(n=10, phase='total') :
+        the n command names with the largest mean time
+
+    dump(filename) :
+        write the summary to a .json or .csv file
+
+    reset() :
+        clear all counts
+
+    timer(name) :
+        a Timer that records the phases of one get or set of name
+    """
+
+    def __init__(self):
+        self._hists = {}
+
+    def record(self, name, phase, seconds):
+        try:
+            hist = self._hists[(name, phase)]
+        except KeyError:
+            hist = self._hists[(name, phase)] = Histogram()
+        hist.add(seconds)
+
+    def timer(self, name):
+        return Timer(self, name)
+
+    def reset(self):
+        self._hists.clear()
+
+    def summary(self):
+        summ = {}
+        for (name, phase), hist in sorted(self._hists.items()):
+            summ.setdefault(name, {})[phase] = hist.summary()
+        return summ
+
+    def slowest(self, n=10, phase='total'):
+        """ returns a list of (name, mean seconds), slowest first """
+        means = [(name, hist.total / hist.count)
+                 for (name, p), hist in self._hists.items() if p == phase and hist.count]
+        return sorted(means, key=lambda m: m[1], reverse=True)[:n]
+
+    def dump(self, filename):
+        """ write the summary; the format (JSON or CSV) is chosen by the file extension
+
+        In the CSV file each row is a (name, phase) and the histogram columns are
+        named by the bin upper edge in seconds.
+        """
+        summ = self.summary()
+        if filename.lower().endswith('.json'):
+            with open(filename, 'w') as fp:
+                json.dump({'bin_edges': BIN_EDGES, 'commands': summ}, fp, indent=1)
+        elif filename.lower().endswith('.csv'):
+            with open(filename, 'w', newline='') as fp:
+                writer = csv.writer(fp)
+                writer.writerow(['name', 'phase', 'count', 'total', 'mean', 'min', 'max']
+                                + ['le_{:g}'.format(e) for e in BIN_EDGES])
+                for name, phases in summ.items():
+                    for phase, s in phases.items():
+                        writer.writerow([name, phase, s['count'], s['total'], s['mean'],
+                                         s['min'], s['max']] + s['hist'])
+        else:
+            print('Warning: unknown file extension for {}; use .json or .csv'.format(filename))
+            raise ValueError
+
+    def __repr__(self):
+        lines = ['{:<24} {:<10} {:>8} {:>12} {:>12}'.format('name', 'phase', 'count', 'mean [ms]', 'max [ms]')]
+        for name, phases in self.summary().items():
+            for phase, s in phases.items():
+                lines.append('{:<24} {:<10} {:>8} {:>12.3f} {:>12.3f}'.format(
+                    name, phase, s['count'], s['mean'] * 1e3, s['max'] * 1e3))
+        return '\n'.join(lines)
@@ -0,0 +1,72 @@
+import os
+import shutil
+import tempfile
+import pytest
+import instrbuilder
+from instrbuilder import definitions, instruments
+from instrbuilder.instrument_opening import open_by_address
+from instrbuilder.scpi import init_instrument
+
+instrument_cmds = os.path.join(os.path.dirname(instrbuilder.__file__), 'instruments')
+no_address = {'no_interface': 'no_address'}
+
+
+def pytest_configure(config):
+    # instruments opened when test modules are imported (before any fixture runs) must not
+    #   write to ~/.instrbuilder/cache either
+    config._definition_cache = tempfile.mkdtemp(prefix='instrbuilder_cache_')
+    definitions.cache_dir = config._definition_cache
+
+
+def pytest_unconfigure(config):
+    shutil.rmtree(config._definition_cache, ignore_errors=True)
+
+
+@pytest.fixture(autouse=True)
+def definition_cache(tmpdir, monkeypatch):
+    """ keep the compiled definition cache of each test in a temporary directory
+        (not ~/.instrbuilder/cache) and start without definitions loaded by other tests """
+    cache_dir = tmpdir.mkdir('definition_cache')
+    monkeypatch.setattr(definitions, 'cache_dir', str(cache_dir))
+    monkeypatch.setattr(definitions, '_loaded', {})
+    return cache_dir
+
+
+class FakeComm(object):
+    """ fake transport: records the strings written and queried; a query returns replies[cmd_str]
+        (or default). Subclasses that return binary data define read_raw, usually with block() """
+
+    def __init__(self, replies=None, default='fake'):
+        self.replies = dict(replies or {})
+        self.default = default
+        self.written = []
+        self.queries = []
+
+    def write(self, cmd_str):
+        self.written.append(cmd_str)
+
+    def query(self, cmd_str):
+        self.queries.append(cmd_str)
+        return self.replies.get(cmd_str, self.default)
+
+    @staticmethod
+    def block(data):
+        """ the numpy array data as an IEEE 488.2 definite length block """
+        length = '{}'.format(data.nbytes)
+        return '#{}{}'.format(len(length), length).encode() + data.tobytes() + b'\n'
+
+
+@pytest.fixture
+def open_unconnected():
+    """ open_unconnected(csv_folder, comm=None, instr_class='TestInstrument') opens an instrument
+        of instruments/csv_folder that talks to comm (a fake transport), or without comm to the
+        debug transport that prints every command """
+    def open_instr(csv_folder, comm=None, instr_class='TestInstrument'):
+        if comm is None:
+            return open_by_address(addr=no_address, csv_dir=instrument_cmds,
+                                   csv_folder=csv_folder, instr_class=instr_class)
+        folder = os.path.join(instrument_cmds, csv_folder)
+        cmd_list, _, _ = init_instrument(os.path.join(folder, 'commands.csv'), addr=no_address,
+                                         lookup=os.path.join(folder, 'lookup.csv'))
+        return getattr(instruments, instr_class)(cmd_list, comm)
+    return open_instr
@@ -0,0 +1,86 @@
+import asyncio
+import threading
+import time
+from instrbuilder.async_scpi import AsyncSCPI
+from instrbuilder.rack import Rack
+from .conftest import FakeComm
+
+
+def run_until_complete(coro):
+    """ asyncio.run, which needs Python 3.7 """
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coro)
+    finally:
+        loop.close()
+
+
+def test_aset_aget(open_unconnected, capsys):
+    """ coroutines send the same strings as get/set """
+    instr = AsyncSCPI(open_unconnected('tester'))
+    capsys.readouterr()
+
+    async def run():
+        await instr.aset('trigger_level', 0.5, configs={'chan': 1})
+        return await instr.aget('trigger_level', configs={'chan': 1})
+
+    assert run_until_complete(run()) == 0.5
+    assert capsys.readouterr().out == ':TRIG:LEV 0.5, CHAN1\n:TRIG:LEV? CHAN1\n'
+    assert instr.name == 'tester'
+
+
+class OverlapComm(FakeComm):
+    """ fake transport (shared by several instruments) that counts the reads in progress at once.
+    With a barrier, each read waits until that many reads are in progress. """
+
+    def __init__(self, barrier=None, delay=0.02):
+        super(OverlapComm, self).__init__({'*IDN?': 'tester'}, default='0.1')
+        self.barrier = barrier
+        self.delay = delay
+        self.active = 0
+        self.most = 0
+        self._lock = threading.Lock()
+
+    def query(self, cmd_str):
+        if cmd_str == '*IDN?':
+            return super(OverlapComm, self).query(cmd_str)
+        with self._lock:
+            self.active += 1
+            self.most = max(self.most, self.active)
+        if self.barrier is not None:
+            self.barrier.wait(timeout=5)
+        time.sleep(self.delay)
+        with self._lock:
+            self.active -= 1
+        return super(OverlapComm, self).query(cmd_str)
+
+
+def test_gather_overlaps(open_unconnected):
+    """ reads of different instruments overlap (each read waits for all 4 to be in progress) """
+    comm = OverlapComm(barrier=threading.Barrier(4))
+    instrs = [AsyncSCPI(open_unconnected('tester', comm)) for _ in range(4)]
+    for instr in instrs:
+        instr.set('time_range', 0.1)
+
+    async def run():
+        return await asyncio.gather(*[instr.aget('time_range') for instr in instrs])
+
+    assert run_until_complete(run()) == [0.1] * 4
+    assert comm.most == 4
+
+
+def test_instrument_lock(open_unconnected):
+    """ two wrappers of one instrument, and a Rack, do not interleave calls to the instrument """
+    comm = OverlapComm()
+    instr = open_unconnected('tester', comm)
+    a, b = AsyncSCPI(instr), AsyncSCPI(instr)
+    rack = Rack({'osc': instr})
+
+    async def run():
+        rack_reads = asyncio.get_event_loop().run_in_executor(
+            None, rack.get, {'osc': ['time_range'] * 4})
+        return await asyncio.gather(rack_reads, *[w.aget('time_range') for w in (a, b) * 4])
+
+    run_until_complete(run())
+    assert comm.most == 1
+    rack.close()
@@ -0,0 +1,91 @@
+import timeit
+
+from .conftest import FakeComm
+
+# calls per timing; the best of REPEAT timings is compared so that a busy machine does not fail the test
+NUMBER = 1000
+REPEAT = 15
+
+
+class NullComm(FakeComm):
+    """ a transport that answers every query with '0.1' and keeps nothing """
+
+    def __init__(self):
+        super().__init__(default='0.1')
+
+    def write(self, cmd_str):
+        pass
+
+    def query(self, cmd_str):
+        return self.default
+
+
+def baseline_get(instr, name, configs={}):
+    """ SCPI.get as it was before the compiled commands, the state cache and the stats """
+    if not instr._cmds[name].getter:
+        raise NotImplementedError
+    if instr._cmds[name].getter_override is not None:
+        return instr._cmds[name].getter_override(**configs)
+
+    cmd_str = instr._cmds[name].ascii_str_get
+    ret_val = instr._ask(cmd_str.format(**configs))
+    if instr.unconnected:
+        try:
+            ret_val = instr._cmds[name]._unconnected_val
+        except Exception:
+            pass
+    try:
+        val = instr._cmds[name].getter_type(ret_val)
+        if bool(instr._cmds[name].lookup):
+            try:
+                val = list(instr._cmds[name].lookup.keys())[list(
+                    instr._cmds[name].lookup.values()).index(val)]
+            except ValueError:
+                pass
+        return val
+    except ValueError:
+        pass
+
+
+def baseline_set(instr, name, value=None, configs={}):
+    """ SCPI.set (with check_set_range) as it was before the compiled commands """
+    cmd_str = instr._cmds[name].ascii_str
+    if value is not None:
+        if value in instr._cmds[name].lookup:
+            value = instr._cmds[name].lookup[value]
+        limits = instr._cmds[name].limits
+        if limits is not None:
+            if (len(limits) == 2) and (type(limits[0]) is not str):
+                in_range = (value >= limits[0]) and (value <= limits[1])
+            else:
+                in_range = value in limits
+            if not in_range:
+                instr.out_of_range_warning(value, name)
+        cmd_str = cmd_str.format(value=value, **configs)
+    else:
+        cmd_str = cmd_str.format(value='').rstrip()
+    if instr.unconnected:
+        instr._cmds[name]._unconnected_val = value
+    return instr._write(cmd_str)
+
+
+def best_ns(func, baseline):
+    """ the best time per call (ns) of func and of baseline, timed in turns so that both see the same load """
+    times = []
+    for _ in range(REPEAT):
+        times.append((timeit.timeit(func, number=NUMBER), timeit.timeit(baseline, number=NUMBER)))
+    return [min(t) / NUMBER * 1e9 for t in zip(*times)]
+
+
+def test_get_set_faster_than_baseline(open_unconnected):
+    instr = open_unconnected('tester', NullComm())
+    instr.unconnected = False  # time the path of a connected instrument
+    assert instr.get('time_range') == baseline_get(instr, 'time_range') == 0.1
+
+    t_get, t_base_get = best_ns(lambda: instr.get('time_range'),
+                                lambda: baseline_get(instr, 'time_range'))
+    assert t_get < t_base_get, 'get {:.0f} ns; baseline {:.0f} ns'.format(t_get, t_base_get)
+
+    t_set, t_base_set = best_ns(lambda: instr.set('time_range', 0.1),
+                                lambda: baseline_set(instr, 'time_range', 0.1))
+    assert t_set < t_base_set, 'set {:.0f} ns; baseline {:.0f} ns'.format(t_set, t_base_set)
@@ -72,3 +72,157 @@ def test_trigger_slope_lookup_omit_set(capsys):
     captured = capsys.readouterr()
     assert captured.out == ':TRIG:SLOP EITH\n'
 
+
+def test_set_many(capsys):
+    """ several sets are joined into one compound command """
+    test_instr.set_many([('time_range', 0.1), ('trigger_slope', 'EITHER'),
+                         ('trigger_level', 0.5, {'chan': 1})])
+    captured = capsys.readouterr()
+    assert captured.out == ':TIM:RANG 0.1;:TRIG:SLOP EITH;:TRIG:LEV 0.5, CHAN1\n'
+
+def test_batch_write_length(capsys, monkeypatch):
+    """ a batch is split into writes no longer than max_write_length """
+    monkeypatch.setattr(test_instr, 'max_write_length', 30)
+    with test_instr.batch():
+        test_instr.set('time_range', 0.1)
+        test_instr.set('time_pos', 0)
+        test_instr.set('trigger_slope', 'EITHER')
+        assert capsys.readouterr().out == ''
+    captured = capsys.readouterr()
+    assert captured.out == ':TIM:RANG 0.1;:TIM:POS 0\n:TRIG:SLOP EITH\n'
+
+def test_batch_flush_before_get(capsys):
+    """ a get within a batch sends the queued sets first """
+    with test_instr.batch():
+        test_instr.set('time_range', 0.2)
+        assert test_instr.get('time_range') == 0.2
+        captured = capsys.readouterr()
+        assert captured.out == ':TIM:RANG 0.2\n:TIM:RANG?\n'
+
+def test_get_many(capsys):
+    """ several gets are sent as one compound query """
+    test_instr.set('time_range', 0.3)
+    test_instr.set('trigger_slope', 'EITH')
+    capsys.readouterr()
+    values = test_instr.get_many(['time_range', 'trigger_slope'])
+    captured = capsys.readouterr()
+    assert captured.out == ':TIM:RANG?;:TRIG:SLOP?\n'
+    assert values == [0.3, 'EITHER']
+
+def test_get_many_split():
+    """ the compound response is split and converted for each command """
+    instr = open_by_address(addr=addr, csv_dir=instrument_cmds,
+                            csv_folder='tester', instr_class='TestInstrument')
+    instr.unconnected = False
+    instr._ask = lambda query: '+5.0E-01;EITH;+2.5E-01\n'
+    values = instr.get_many(['time_range', 'trigger_slope', 'trigger_level'],
+                            configs=[{}, {}, {'chan': 2}])
+    assert values == [0.5, 'EITHER', 0.25]
+
+def test_state_cache(capsys):
+    """ with the cache on, unchanged sets and cached gets are not sent """
+    instr = open_by_address(addr=addr, csv_dir=instrument_cmds,
+                            csv_folder='tester', instr_class='TestInstrument')
+    instr.enable_cache()
+    capsys.readouterr()
+    instr.set('time_range', 0.1)
+    instr.set('time_range', 0.1)
+    instr.set('trigger_slope', 'EITH')
+    assert instr.get('time_range') == 0.1
+    assert instr.get('trigger_slope') == 'EITHER'
+    instr.set('trigger_slope', 'EITHER')
+    assert capsys.readouterr().out == ':TIM:RANG 0.1\n:TRIG:SLOP EITH\n'
+
+    # reset clears the cache
+    instr.set('reset')
+    instr.get('time_range')
+    assert capsys.readouterr().out == '*RST\n:TIM:RANG?\n'
+
+    # refresh re-reads cached values
+    assert instr.refresh() == {('time_range', ()): 0.1}
+    assert capsys.readouterr().out == ':TIM:RANG?\n'
+
+
+def test_state_cache_failed_write(capsys):
+    """ the cache holds a value only once it is written """
+    instr = open_by_address(addr=addr, csv_dir=instrument_cmds,
+                            csv_folder='tester', instr_class='TestInstrument')
+    instr.enable_cache()
+    instr.set('time_range', 0.1)
+
+    def write(cmd_str):
+        raise IOError('VI_ERROR_TMO')
+    instr._write, good_write = write, instr._write
+    with pytest.raises(IOError):
+        instr.set('time_range', 0.2)
+    assert ('time_range', ()) not in instr._state_cache
+    with pytest.raises(IOError):
+        with instr.batch():
+            instr.set('time_range', 0.3)
+    assert ('time_range', ()) not in instr._state_cache
+
+    # a queued set is compared with (and read back) as the value the instrument will have
+    instr._write = good_write
+    instr.set('time_range', 0.1)
+    capsys.readouterr()
+    with instr.batch():
+        instr.set('time_range', 0.2)
+        assert instr._state_cache[('time_range', ())] == 0.1
+        instr.set('time_range', 0.1)
+    assert capsys.readouterr().out == ':TIM:RANG 0.2;:TIM:RANG 0.1\n'
+    assert instr.get('time_range') == 0.1
+
+
+def test_lazy_command_table(capsys):
+    """ commands are built on first use; help, list_cmds and dir do not need the others built """
+    from instrbuilder.command import CommandTable
+    instr = open_by_address(addr=addr, csv_dir=instrument_cmds,
+                            csv_folder='tester', instr_class='TestInstrument')
+    assert isinstance(instr._cmds, CommandTable)
+    assert instr._cmds.built == ['id']  # read when opened
+    assert 'time_range' in instr._cmds and 'time_range' in dir(instr)
+    assert instr._cmds.built == ['id']
+
+    eager = open_by_address(addr=addr, csv_dir=instrument_cmds, csv_folder='tester',
+                            instr_class='TestInstrument', lazy=False)
+    assert list(instr._cmds) == list(eager._cmds)
+    for name in eager._cmds:
+        lazy_cmd, cmd = instr._cmds[name], eager._cmds[name]
+        assert (lazy_cmd.ascii_str, lazy_cmd.ascii_str_get, lazy_cmd.get_config_keys, lazy_cmd.limits) == \
+               (cmd.ascii_str, cmd.ascii_str_get, cmd.get_config_keys, cmd.limits)
+        assert lazy_cmd.getter_type is cmd.getter_type and dict(lazy_cmd.lookup) == dict(cmd.lookup)
+
+    capsys.readouterr()
+    instr.list_cmds()
+    assert capsys.readouterr().out.split() == list(eager._cmds)
+    instr.help('time_range')
+    assert 'time_range' in capsys.readouterr().out
+
+
+def test_command_table_factory_error():
+    """ a command that fails to build is not lost; threads build each command once """
+    import threading
+    import time
+    from instrbuilder.command import CommandTable
+    built = []
+
+    def factory(row):
+        if row['name'] == 'b' and not built:
+            raise ValueError('bad row')
+        time.sleep(0.01)  # threads arrive while the command is built
+        built.append(row['name'])
+        return row['name']
+
+    table = CommandTable([{'name': 'a'}, {'name': 'b'}], factory=factory)
+    with pytest.raises(ValueError):
+        table['b']
+    assert 'b' in table
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(table['a'])) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert results == ['a'] * 8 and built == ['a']
+    assert table['b'] == 'b'  # built on the next access
@@ -0,0 +1,65 @@
+import glob
+import os
+import numpy as np
+import pytest
+import instrbuilder
+from instrbuilder.scpi import init_instrument
+from instrbuilder.command import compile_limits
+
+instrument_cmds = os.path.join(os.path.dirname(instrbuilder.__file__), 'instruments')
+csv_folders = sorted(os.path.dirname(f) for f in
+                     glob.glob(os.path.join(instrument_cmds, '**', 'commands.csv'), recursive=True))
+
+set_values = [0, 1, -3.5, 0.1, 1e-6, 2.5e9, 'EITH', 'REAL,64', np.float64(0.77), np.int64(4)]
+config_values = [1, 'DC', 0.5, 'VAVG']
+
+
+def check_limits(limits, value):
+    """ the range check from SCPI.check_set_range before commands were compiled """
+    if (len(limits) == 2) and (type(limits[0]) is not str):
+        return (value >= limits[0]) and (value <= limits[1])
+    else:
+        return value in limits
+
+
+@pytest.mark.parametrize('folder', csv_folders,
+                         ids=[os.path.relpath(f, instrument_cmds) for f in csv_folders])
+def test_compiled_matches_format(folder):
+    """ the compiled setter/getter strings match str.format byte-for-byte for every csv """
+    cmd_list, _, _ = init_instrument(os.path.join(folder, 'commands.csv'),
+                                     addr={'no_interface': 'no_address'},
+                                     lookup=os.path.join(folder, 'lookup.csv'))
+    for cmd in cmd_list:
+        for config_val in config_values:
+            configs = dict.fromkeys(cmd.set_config_keys + cmd.get_config_keys, config_val)
+            set_configs = {k: v for k, v in configs.items() if k != 'value'}
+            for value in set_values:
+                expected = cmd.ascii_str.format(value=value, **set_configs)
+                assert cmd.format_set(value, set_configs).encode() == expected.encode()
+            if not cmd.set_config_keys:
+                assert cmd.format_set('', {}).rstrip() == cmd.ascii_str.format(value='').rstrip()
+            if cmd.ascii_str_get is not None:
+                assert cmd.format_get(configs).encode() == cmd.ascii_str_get.format(**configs).encode()
+
+        if cmd.limits is not None:
+            for value in set_values:
+                try:
+                    expected = check_limits(cmd.limits, value)
+                except TypeError:
+                    with pytest.raises(TypeError):
+                        cmd.in_range(value)
+                    continue
+                assert cmd.in_range(value) == expected
+
+
+def test_limits_changed_in_place():
+    limits = [0, 10]
+    in_range = compile_limits(limits)
+    assert in_range(7)
+    limits[1] = 5
+    assert not in_range(7)
+
+    members = ['EXT', 'INT']
+    in_range = compile_limits(members)
+    members.append('BUS')
+    assert in_range('BUS')
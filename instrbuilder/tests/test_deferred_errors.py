@@ -0,0 +1,52 @@
+from instrbuilder.command import Command
+from instrbuilder.scpi import SCPI, keysight_error
+from .conftest import FakeComm
+
+
+class ErrorQueueComm(FakeComm):
+    """ fake instrument that remembers set values and queues an error for the header BAD """
+
+    def __init__(self):
+        super(ErrorQueueComm, self).__init__({'*IDN?': 'fake'})
+        self.values = {}
+        self.errors = []
+        self.err_reads = 0
+
+    def write(self, cmd_str):
+        super(ErrorQueueComm, self).write(cmd_str)
+        header, value = cmd_str.split(' ')
+        self.values[header] = value
+        if header.startswith(':BAD'):
+            self.errors.append('-113,"Undefined header"')
+
+    def query(self, cmd_str):
+        if cmd_str == 'SYST:ERR?':
+            self.err_reads += 1
+            return self.errors.pop(0) if self.errors else '+0,"No error"'
+        if cmd_str == '*IDN?':
+            return super(ErrorQueueComm, self).query(cmd_str)
+        return self.values.get(cmd_str[:-1], '0')
+
+
+def make_instr():
+    cmds = [Command(name='id', ascii_str='*IDN', ascii_str_get='*IDN?', setter=False, getter_type=str),
+            Command(name='comm_error', ascii_str='SYST:ERR', ascii_str_get='SYST:ERR?', setter=False,
+                    getter_type=keysight_error, subsystem='system')]
+    for i in range(20):
+        header = ':BAD{}'.format(i) if i == 13 else ':GOOD{}'.format(i)
+        cmds.append(Command(name='cmd{}'.format(i), ascii_str=header + ' {value}',
+                            ascii_str_get=header + '?', limits=[1, 2]))
+    comm = ErrorQueueComm()
+    return SCPI(cmds, comm), comm
+
+
+def test_deferred_errors():
+    instr, comm = make_instr()
+    immediate = instr.test_all()
+    immediate_reads = comm.err_reads
+
+    instr, comm = make_instr()
+    deferred = instr.test_all(deferred_errors=True, batch_size=8)
+    assert deferred == immediate
+    assert [k for k, v in deferred.items() if not v] == ['cmd13']
+    assert comm.err_reads < immediate_reads / 3
@@ -0,0 +1,93 @@
+import glob
+import os
+import pickle
+import shutil
+import pytest
+import instrbuilder
+from instrbuilder import definitions
+from instrbuilder.scpi import commands_from_definitions
+from instrbuilder.cli import main
+
+instrument_cmds = os.path.join(os.path.dirname(instrbuilder.__file__), 'instruments')
+srs = os.path.join(instrument_cmds, 'srs', 'lock_in', 'sr810')
+csv_files = sorted(glob.glob(os.path.join(instrument_cmds, '**', '*.csv'), recursive=True))
+
+
+def test_cache_matches_parse(definition_cache):
+    """ rows from the cache are the same as a fresh parse, and build the same commands """
+    cmd_map, lookup = os.path.join(srs, 'commands.csv'), os.path.join(srs, 'lookup.csv')
+
+    parsed = definitions.read_definitions(cmd_map, lookup)
+    first = definitions.load_definitions(cmd_map, lookup)   # parses and writes the cache
+    assert os.path.isfile(definitions.cache_filename(cmd_map, lookup))
+    cached = definitions.load_definitions(cmd_map, lookup)  # reads the cache
+    assert str(parsed) == str(first) == str(cached)
+
+    for a, b in zip(commands_from_definitions(parsed), commands_from_definitions(cached)):
+        assert a.name == b.name
+        assert a.getter_type is b.getter_type
+        assert a.ascii_str == b.ascii_str and a.ascii_str_get == b.ascii_str_get
+        assert a.limits == b.limits
+        assert dict(a.lookup) == dict(b.lookup)
+
+
+def test_cache_invalidated_on_edit(tmpdir, definition_cache):
+    folder = tmpdir.join('instr')
+    shutil.copytree(srs, str(folder))
+    cmd_map, lookup = str(folder.join('commands.csv')), str(folder.join('lookup.csv'))
+
+    n = len(definitions.load_definitions(cmd_map, lookup))
+    with open(cmd_map, 'ab') as fp:
+        fp.write(b'\r\nnew_cmd,NEWC,,TRUE,float,FALSE,none,None,new command,,FALSE,,')
+    rows = definitions.load_definitions(cmd_map, lookup)
+    assert len(rows) == n + 1
+    assert rows[-1]['name'] == 'new_cmd'
+
+
+def test_cli_build_cache(definition_cache, capsys):
+    assert main(['build-cache', instrument_cmds]) == 0
+    folders = [os.path.dirname(os.path.join(dp, f)) for dp, _, fs in os.walk(instrument_cmds)
+               for f in fs if f == 'commands.csv']
+    assert len(definition_cache.listdir()) == len(folders)
+    assert 'srs/lock_in/sr810' in capsys.readouterr().out
+
+    assert main(['clear-cache']) == 0
+    assert definition_cache.listdir() == []
+
+
+def _typed(value):
+    """ a comparable (type, value) of a pandas or csv cell """
+    import numpy as np
+    if isinstance(value, (bool, np.bool_)):
+        return ('bool', bool(value))
+    if isinstance(value, (int, np.integer)):
+        return ('int', int(value))
+    if isinstance(value, (float, np.floating)):
+        return ('nan', None) if value != value else ('float', float(value))
+    return (type(value).__name__, value)
+
+
+@pytest.mark.parametrize('csv_file', csv_files,
+                         ids=[os.path.relpath(f, instrument_cmds) for f in csv_files])
+def test_read_csv_matches_pandas(csv_file):
+    """ the csv module reader gives the same values and types as pandas.read_csv """
+    pd = pytest.importorskip('pandas')
+    df = pd.read_csv(csv_file)
+    df = df.rename(columns=lambda x: x.strip())
+    rows = definitions.read_csv(csv_file)
+
+    assert len(rows) == len(df)
+    assert all(list(row) == list(df.columns) for row in rows)
+    for col in df.columns:
+        assert [_typed(row[col]) for row in rows] == [_typed(v) for v in df[col]], col
+
+
+def test_cache_write_failure(definition_cache, monkeypatch, capsys):
+    """ a failed write warns and leaves neither a cache file nor a temporary file """
+    def dump(*args, **kwargs):
+        raise pickle.PicklingError('cannot pickle')
+    monkeypatch.setattr(pickle, 'dump', dump)
+    rows = definitions.load_definitions(os.path.join(srs, 'commands.csv'), os.path.join(srs, 'lookup.csv'))
+    assert len(rows) > 0
+    assert 'could not write the definition cache' in capsys.readouterr().out
+    assert definition_cache.listdir() == []
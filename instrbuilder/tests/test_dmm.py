@@ -0,0 +1,144 @@
+import time
+import numpy as np
+import pytest
+from .conftest import FakeComm
+
+dmm_folder = 'keysight/multimeter/34465A'
+
+
+class DMMComm(FakeComm):
+    """ fake 34465A: each FETC? returns the readings of the next burst as a little-endian REAL block """
+
+    def __init__(self, reads):
+        super(DMMComm, self).__init__()
+        self.reads = reads
+        self.bursts = 0
+
+    def read_raw(self):
+        data = np.arange(self.reads, dtype='<f8') + 100 * self.bursts
+        self.bursts += 1
+        return self.block(data)
+
+
+def test_burst_volt_timer(open_unconnected):
+    comm = DMMComm(reads=8)
+    dmm = open_unconnected(dmm_folder, comm, 'KeysightMultimeter')
+    comm.written = []
+    ret = dmm.burst_volt_timer(reads_per_trigger=8, repeats=3)
+    np.testing.assert_array_equal(ret, np.concatenate([np.arange(8) + 100 * i for i in range(3)]))
+    assert ':FORM:DATA REAL;:FORM:BORD SWAP' in comm.written[0]
+    # the next burst is armed before the previous one is decoded; ASCII is restored at the end
+    assert comm.written[1:] == ['INIT', 'FETC?', 'INIT', 'FETC?', 'INIT', 'FETC?', 'FORM:DATA ASC']
+
+
+    # a burst with the wrong number of readings
+    comm = DMMComm(reads=7)
+    dmm = open_unconnected(dmm_folder, comm, 'KeysightMultimeter')
+    with pytest.raises(ValueError):
+        dmm.burst_volt_timer(reads_per_trigger=8, repeats=3)
+    assert comm.written[-2:] == ['ABOR', 'FORM:DATA ASC']
+
+
+def test_burst_volt_upload(open_unconnected, tmpdir):
+    comm = DMMComm(reads=16)
+    dmm = open_unconnected(dmm_folder, comm, 'KeysightMultimeter')
+    expected = np.concatenate([np.arange(16) + 100 * i for i in range(4)])
+    np.testing.assert_array_equal(dmm.burst_volt_upload(repeats=4), expected)
+    assert [f for f, _, _ in dmm.upload_times] == ['test_{}.dat'.format(i) for i in range(4)]
+    assert comm.written[-1] == 'MMEM:UPL? "INT:\\test_3.dat"'
+
+    # into a memmap, uploading in a thread
+    comm.bursts = 0
+    out = np.memmap(str(tmpdir.join('readings.dat')), dtype=np.float64, mode='w+', shape=(64,))
+    ret = dmm.burst_volt_upload(repeats=4, out=out, overlap=True)
+    assert ret.base is out or ret.base is out.base
+    np.testing.assert_array_equal(out, expected)
+
+
+def test_burst_volt_upload_verbose(open_unconnected, monkeypatch, capsys):
+    """ an upload timed as 0 s (a coarse clock) does not divide by zero """
+    monkeypatch.setattr(time, 'perf_counter', lambda: 1.0)
+    monkeypatch.setattr(time, 'time', lambda: 1.0)
+    dmm = open_unconnected(dmm_folder, DMMComm(reads=16), 'KeysightMultimeter')
+    dmm.burst_volt_upload(repeats=1, verbose=True)
+    assert 'Uploaded test_0.dat' in capsys.readouterr().out
+
+
+class StreamComm(FakeComm):
+    """ fake 34465A taking readings (0, 1, 2, ...) at a fixed rate """
+
+    def __init__(self, total, rate):
+        super(StreamComm, self).__init__()
+        self.total = total
+        self.rate = rate
+        self.removed = 0
+        self.to_remove = 0
+        self.t0 = None
+
+    def taken(self):
+        if self.t0 is None:
+            return 0
+        return min(self.total, int((time.time() - self.t0) * self.rate))
+
+    def write(self, cmd_str):
+        super(StreamComm, self).write(cmd_str)
+        if cmd_str.endswith('INIT'):
+            self.t0 = time.time()
+        if cmd_str.startswith('DATA:REM?'):
+            self.to_remove = int(cmd_str.split(' ')[1])
+
+    def query(self, cmd_str):
+        busy = 16 if self.taken() < self.total else 0
+        threshold = 512 if self.taken() - self.removed >= 10 else 0
+        self.replies = {'DATA:POIN?;:STAT:OPER:COND?': '{};{}'.format(self.taken() - self.removed, busy),
+                        'DATA:POIN?': str(self.taken() - self.removed),
+                        'STAT:OPER:COND?': str(busy + threshold)}
+        return super(StreamComm, self).query(cmd_str)
+
+    def read_raw(self):
+        data = np.arange(self.removed, self.removed + self.to_remove, dtype='<f8')
+        self.removed += self.to_remove
+        return self.block(data)
+
+
+def test_stream(open_unconnected):
+    comm = StreamComm(total=200, rate=2000)
+    dmm = open_unconnected(dmm_folder, comm, 'KeysightMultimeter')
+    blocks = list(dmm.stream(poll=0.005, sample_interval=1 / 2000.))
+    t, vals = [np.concatenate(b) for b in zip(*blocks)]
+    np.testing.assert_array_equal(vals, np.arange(200))
+    np.testing.assert_allclose(t, np.arange(200) / 2000.)
+    assert len(blocks) > 1
+    assert comm.written[-1] == 'FORM:DATA ASC' and 'ABOR' not in comm.written
+
+    # threshold status bit, stopped early: the measurement is aborted
+    comm = StreamComm(total=10000, rate=2000)
+    dmm = open_unconnected(dmm_folder, comm, 'KeysightMultimeter')
+    blocks = list(dmm.stream(total=50, poll=0.005, threshold=10, block_points=20))
+    assert np.concatenate([v for _, v in blocks]).size == 50
+    assert max(v.size for _, v in blocks) <= 20
+    assert comm.written[-2:] == ['ABOR', 'FORM:DATA ASC']
+
+
+class FinishedComm(StreamComm):
+    """ the measurement finishes between the reading count and the status of each compound poll """
+
+    def query(self, cmd_str):
+        if cmd_str == 'DATA:POIN?;:STAT:OPER:COND?':
+            return '0;0'
+        return super(FinishedComm, self).query(cmd_str)
+
+
+def test_stream_drains(open_unconnected):
+    comm = FinishedComm(total=100, rate=1e9)
+    dmm = open_unconnected(dmm_folder, comm, 'KeysightMultimeter')
+    vals = np.concatenate([v for _, v in dmm.stream(poll=0.005)])
+    np.testing.assert_array_equal(vals, np.arange(100))
+
+    # an unreadable status stops the stream (rather than a TypeError)
+    comm = StreamComm(total=100, rate=2000)
+    comm.query = lambda cmd_str: 'garbled'
+    dmm = open_unconnected(dmm_folder, comm, 'KeysightMultimeter')
+    with pytest.raises(ValueError):
+        list(dmm.stream(poll=0.005))
+    assert 'ABOR' in comm.written
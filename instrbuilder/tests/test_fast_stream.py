@@ -0,0 +1,49 @@
+import io
+import time
+import numpy as np
+from .conftest import FakeComm
+
+
+class ReplayComm(FakeComm):
+    """ fake GPIB transport that replays a FAST mode byte stream, in pieces of odd length """
+
+    def __init__(self, stream):
+        super(ReplayComm, self).__init__(
+            {'*IDN?': 'Stanford_Research_Systems,SR810', 'SENS?': '26', 'SRAT?': '13'}, default='0')
+        self.stream = io.BytesIO(stream)
+
+    def read_bytes(self, count):
+        self.reading = True
+        data = self.stream.read(min(count, 7))
+        if not data:
+            time.sleep(1e-3)  # a real transport would wait for the timeout
+        self.reading = False
+        return data
+
+    def write(self, cmd_str):
+        assert not getattr(self, 'reading', False), '{} written during a read'.format(cmd_str)
+        super(ReplayComm, self).write(cmd_str)
+
+
+def test_fast_stream(open_unconnected):
+    x = np.arange(-1000, 1000, dtype='<i2')
+    y = -x
+    words = np.empty(2 * x.size, dtype='<i2')
+    words[0::2] = x
+    words[1::2] = y
+    comm = ReplayComm(words.tobytes())
+    lia = open_unconnected('srs/lock_in/sr810', comm, 'SRSLockIn')
+
+    received = []
+    with lia.fast_stream(ring_size=4096, callback=lambda t, x, y: received.append(len(x))) as stream:
+        blocks = list(stream.blocks(timeout=0.2))
+    assert comm.written[:3] == ['REST', 'FAST 2', 'STRD']
+    assert comm.written[-2:] == ['PAUS', 'FAST 0']
+
+    t, xs, ys = [np.concatenate(b) for b in zip(*blocks)]
+    full_scale = 1.0  # sensitivity 26 = 1 V
+    np.testing.assert_allclose(xs, x * full_scale / 30000, rtol=1e-6)
+    np.testing.assert_allclose(ys, y * full_scale / 30000, rtol=1e-6)
+    np.testing.assert_allclose(np.diff(t), 1 / 512.)  # sample rate 13 = 512 Hz
+    assert sum(received) == x.size
+    np.testing.assert_array_equal(stream.latest(10)[1], xs[-10:])
@@ -0,0 +1,41 @@
+import subprocess
+import sys
+import pytest
+
+# modules that are imported only when a transport, parser or IC that needs them is used
+HEAVY_MODULES = ('pandas', 'pyvisa', 'serial', 'colorama', 'yaml', 'oyaml', 'aardvark_py')
+# cumulative import time of instrbuilder, not counting numpy (which scpi and instruments import
+#   at module level). The lazy imports bring this to about 60 ms; it was over 100 ms when
+#   pyvisa and pandas were imported by scpi
+IMPORT_BUDGET_MS = 100
+# numpy is imported first so that its time is not part of the instrbuilder modules
+IMPORTS = 'import numpy; import instrbuilder.instruments, instrbuilder.instrument_opening, instrbuilder.rack'
+
+
+def import_time_ms():
+    """ the cumulative import time (ms) of each top-level module imported by IMPORTS (python -X importtime) """
+    out = subprocess.run([sys.executable, '-X', 'importtime', '-c', IMPORTS],
+                         stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True,
+                         check=True).stderr
+    times = {}
+    for line in out.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        if not name.startswith('  '):  # top level: imported by the -c statement (or site)
+            times[name.strip()] = int(cumulative) / 1000
+    return times
+
+
+def test_no_heavy_imports():
+    code = IMPORTS + '; import sys; print(",".join(m for m in {!r} if m in sys.modules))'.format(HEAVY_MODULES)
+    out = subprocess.run([sys.executable, '-c', code], stdout=subprocess.PIPE, universal_newlines=True, check=True)
+    assert out.stdout.strip() == ''
+
+
+@pytest.mark.skipif(sys.version_info < (3, 7), reason='python -X importtime needs Python 3.7')
+def test_import_time_budget():
+    # the best of a few runs, so that a busy machine does not fail the test
+    best = min(sum(t for name, t in import_time_ms().items() if name.startswith('instrbuilder'))
+               for _ in range(3))
+    assert best < IMPORT_BUDGET_MS, 'instrbuilder import took {:.1f} ms'.format(best)
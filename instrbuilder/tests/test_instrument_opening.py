@@ -0,0 +1,139 @@
+import os
+import time
+import pytest
+import instrbuilder
+from instrbuilder import instrument_opening, definitions, scpi
+from instrbuilder.instrument_opening import open_by_name, open_many, append_to_yaml, discover_instruments
+
+instrument_cmds = os.path.join(os.path.dirname(instrbuilder.__file__), 'instruments')
+pytest.importorskip('oyaml')
+
+
+@pytest.fixture
+def config_dir(tmpdir, monkeypatch):
+    """ a configuration file with two unconnected testers and a lock-in """
+    monkeypatch.setattr(instrument_opening, 'home', str(tmpdir))
+    instrument_opening.init_yaml(csv_dir=instrument_cmds)
+    append_to_yaml({'osc1': {'address': {'no_interface': 'no_address'}, 'csv_folder': 'tester',
+                             'python_class': 'TestInstrument'},
+                    'osc2': {'address': {'no_interface': 'no_address'}, 'csv_folder': 'tester',
+                             'python_class': 'TestInstrument'},
+                    'lia': {'address': {'no_interface': 'no_address'}, 'csv_folder': 'srs/lock_in/sr810',
+                            'python_class': 'SRSLockIn'}})
+    return tmpdir
+
+
+def test_registry_parses_once(config_dir):
+    registry = instrument_opening.config_registry
+    configs = registry.load()
+    assert registry.load() is configs  # not parsed again
+    assert list(configs['instruments']) == ['osc1', 'osc2', 'lia']
+
+    # a change to the file is seen
+    append_to_yaml({'osc3': {'address': {'no_interface': 'no_address'}, 'csv_folder': 'tester',
+                             'python_class': 'TestInstrument'}})
+    assert 'osc3' in registry.load()['instruments']
+    assert 'osc3' not in configs['instruments']  # append_to_yaml does not change the shared dictionary
+    configs = registry.load()
+    with open(str(config_dir.join('config.yaml')), 'a') as f:
+        f.write('\n# edited outside of instrbuilder\n')
+    assert registry.load() is not configs
+
+
+def test_open_many(config_dir):
+    instrs = open_many(['osc1', 'osc2', 'lia'])
+    assert [instrs[n].name for n in instrs] == ['osc1', 'osc2', 'lia']
+    assert type(instrs['lia']).__name__ == 'SRSLockIn'
+
+    # the testers share one parse of the definitions
+    key = (os.path.join(instrument_cmds, 'tester', 'commands.csv'),
+           os.path.join(instrument_cmds, 'tester', 'lookup.csv'))
+    rows = definitions._loaded[key][1]
+    assert instrs['osc1']._cmds._fields == tuple(rows[0])
+    instrs['osc1']._cmds['acq_count'].limits[0] = -100  # commands do not share state
+    assert instrs['osc2']._cmds['acq_count'].limits == [2, 65536]
+
+    osc = open_by_name('osc1', name_attached='scope')
+    assert osc.name == 'scope'
+
+
+class SlowInstrument(object):
+    def __init__(self, addr, delay):
+        self.addr = addr
+        self.delay = delay
+        self.timeout = 2000  # ms
+
+    def query(self, cmd):
+        if self.delay > self.timeout / 1000:
+            time.sleep(self.timeout / 1000)
+            raise TimeoutError('VI_ERROR_TMO')
+        time.sleep(self.delay)
+        return 'Maker,Model,{},1.0\n'.format(self.addr)
+
+    def close(self):
+        pass
+
+
+class SlowResourceManager(object):
+    """ 20 instruments: each replies after 50 ms, except one that is hung """
+    def __init__(self):
+        self.delays = {'USB0::0x0957::{}::INSTR'.format(i): 0.05 for i in range(20)}
+        self.delays['USB0::0x0957::7::INSTR'] = 100
+        self.probes = 0
+        self.listings = 0
+
+    def list_resources(self, query='?*::INSTR'):
+        self.listings += 1
+        return tuple(self.delays)
+
+    def open_resource(self, addr, open_timeout=0):
+        self.probes += 1
+        return SlowInstrument(addr, self.delays[addr])
+
+
+def test_discover_instruments(config_dir, monkeypatch):
+    mgr = SlowResourceManager()
+    monkeypatch.setattr(scpi, '_resource_managers', {'': mgr})
+    monkeypatch.setattr(scpi, '_resource_listings', {})
+    append_to_yaml({'dmm': {'address': {'pyvisa': 'USB0::0x0957::3::INSTR'},
+                            'csv_folder': 'keysight/multimeter/34465A', 'python_class': 'KeysightMultimeter'}})
+
+    t = time.perf_counter()
+    found = discover_instruments(timeout=0.3)
+    assert time.perf_counter() - t < 1.0  # about one timeout, not 20 probes in series
+    assert [d.address for d in found] == list(mgr.delays)
+    assert found[7].idn is None and found[7].latency >= 0.3
+    assert found[3].idn == 'Maker,Model,USB0::0x0957::3::INSTR,1.0' and found[3].config_name == 'dmm'
+    assert not any(d.cached for d in found)
+
+    # results are cached on disk; only the failed probe is repeated
+    mgr.probes = 0
+    found = discover_instruments(timeout=0.3, ttl=60)
+    assert mgr.probes == 1
+    assert sum(d.cached for d in found) == 19
+    assert found[3].latency < 0.3
+    assert mgr.listings == 2  # the IDN ttl does not apply to the bus listing
+
+
+def test_idn_cache_entries(config_dir):
+    """ malformed entries of the IDN cache are skipped """
+    with open(str(config_dir.join(instrument_opening.IDN_CACHE)), 'w') as f:
+        f.write('{"a": {"idn": "Maker,Model", "latency": 0.01, "time": 5}, "b": {"idn": "Maker"},'
+                ' "c": null, "d": {"idn": "x", "latency": "fast", "time": 5}}')
+    assert list(instrument_opening._read_idn_cache()) == ['a']
+    instrument_opening._write_idn_cache({'a': {'idn': 'Maker,Model', 'latency': 0.01, 'time': 6}})
+    assert instrument_opening._read_idn_cache()['a']['time'] == 6
+    assert not [f for f in config_dir.listdir() if f.ext == '.tmp']
+
+
+def test_detect_instruments_concurrent(config_dir, monkeypatch, capsys):
+    mgr = SlowResourceManager()
+    monkeypatch.setattr(scpi, '_resource_managers', {'': mgr})
+    monkeypatch.setattr(scpi, '_resource_listings', {})
+    prompts = []
+    monkeypatch.setattr('builtins.input', lambda msg: prompts.append(msg) or 'N')
+
+    instr_addrs, not_in_config = instrument_opening.detect_instruments(concurrent=True, timeout=0.2)
+    assert instr_addrs == not_in_config == list(mgr.delays)
+    assert len(prompts) == 20
+    assert 'ID failed on address: USB0::0x0957::7::INSTR' in capsys.readouterr().out
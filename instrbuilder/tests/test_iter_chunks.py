@@ -0,0 +1,79 @@
+import re
+import time
+import numpy as np
+import pytest
+from instrbuilder.command import Command
+from instrbuilder.scpi import SCPI, convert_return
+from .conftest import FakeComm
+
+
+class BufferComm(FakeComm):
+    """ fake SR810 buffer: TRCA? start, num returns the points; each read takes
+    a fixed overhead plus a time per point """
+
+    def __init__(self, data, overhead=1e-3, per_point=1e-6, timeout=None, most=None, extra=0):
+        super(BufferComm, self).__init__({'*IDN?': 'fake'})
+        self.data = data
+        self.most = most  # the most points returned by a read
+        self.extra = extra  # points returned beyond those requested
+        self.overhead = overhead
+        self.per_point = per_point
+        self.timeout = timeout
+        self.counts = []
+
+    def query(self, cmd_str):
+        if cmd_str == '*IDN?':
+            return super(BufferComm, self).query(cmd_str)
+        start, num = [int(x) for x in re.findall(r'\d+', cmd_str)]
+        self.counts.append(num)
+        time.sleep(self.overhead + self.per_point * num)
+        num = num + self.extra if self.most is None else min(num, self.most)
+        return (','.join('{:e}'.format(v) for v in self.data[start:start + num]) + ',\r').encode()
+
+
+def make_instr(comm):
+    cmds = [Command(name='id', ascii_str='*IDN', ascii_str_get='*IDN?', setter=False, getter_type=str),
+            Command(name='read_buffer', ascii_str='TRCA', ascii_str_get='TRCA? {start_pt}, {num_pts}',
+                    setter=False, getter_type=convert_return['byte_array_to_numarray_floats'])]
+    instr = SCPI(cmds, comm)
+    instr.chunk_seconds = 0.02
+    return instr
+
+
+def test_iter_chunks():
+    data = np.arange(20000, dtype=float)
+    comm = BufferComm(data)
+    instr = make_instr(comm)
+    out = np.zeros(19000)
+    chunks = list(instr.iter_chunks('read_buffer', total=19000, chunk=100, start=1000, out=out))
+    np.testing.assert_array_equal(out, data[1000:])
+    np.testing.assert_array_equal(np.concatenate(chunks), data[1000:])
+    assert sum(comm.counts) == 19000
+    assert 100 < comm.counts[1] <= 400  # grows by at most 4x
+    assert max(comm.counts) > 1000
+
+
+def test_iter_chunks_timeout():
+    """ reads are limited to a quarter of the transport timeout (pyvisa, in ms) """
+    data = np.arange(20000, dtype=float)
+    comm = BufferComm(data, per_point=1e-5, timeout=40)
+    instr = make_instr(comm)
+    instr.chunk_seconds = 1
+    chunks = list(instr.iter_chunks('read_buffer', total=20000, chunk=100))
+    np.testing.assert_array_equal(np.concatenate(chunks), data)
+    assert max(comm.counts) < 2000
+
+
+def test_iter_chunks_length():
+    """ a short read is continued; a read with extra points is an error """
+    data = np.arange(1000, dtype=float)
+    comm = BufferComm(data, most=150)
+    instr = make_instr(comm)
+    out = np.zeros(1000)
+    chunks = list(instr.iter_chunks('read_buffer', total=1000, chunk=100, out=out))
+    np.testing.assert_array_equal(out, data)
+    assert max(c.size for c in chunks) == 150
+
+    instr = make_instr(BufferComm(data, extra=1))
+    with pytest.raises(ValueError):
+        list(instr.iter_chunks('read_buffer', total=1000, chunk=100, out=np.zeros(1000)))
@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+from instrbuilder.command import Command, Lookup
+
+
+def test_lookup_both_directions():
+    """ names map to instrument values and back """
+    lookup = Lookup({'Ext': 0, 'Int': 1})
+    assert lookup['Int'] == 1
+    assert lookup.name(1) == 'Int'
+    assert 'Ext' in lookup
+    assert dict(lookup) == {'Ext': 0, 'Int': 1}
+
+
+def test_lookup_numeric_keys():
+    """ numeric names are floats as in init_instrument; int, float and str forms all match """
+    lookup = Lookup({1.0: 26, 2e-9: 0})
+    assert lookup[1] == 26
+    assert lookup['1.00E+00'] == 26
+    assert lookup.name(np.int64(26)) == 1.0
+    assert lookup.name('26') == 1.0
+
+
+def test_lookup_several_names():
+    """ when several names map to one value the first is returned """
+    lookup = Lookup({'EITHER': 'EITH', 'BOTH': 'EITH', 'POS': 'POS'})
+    assert lookup.name('EITH') == 'EITHER'
+    assert lookup.names('EITH') == ('EITHER', 'BOTH')
+    assert lookup.names('NEG') == ()
+    with pytest.raises(KeyError):
+        lookup.name('NEG')
+
+
+def test_lookup_unhashable():
+    """ array returns are not in the table """
+    lookup = Lookup({'X': 0})
+    assert np.array([1, 0]) not in lookup
+    with pytest.raises(KeyError):
+        lookup.name(np.array([1, 0]))
+
+
+def test_lookup_immutable():
+    lookup = Command('ch1_disp', 'DDEF', lookup={'X': 0, 'R': 1}).lookup
+    with pytest.raises(TypeError):
+        lookup['Y'] = 2
@@ -0,0 +1,96 @@
+import numpy as np
+import pytest
+from instrbuilder.scpi import arr_str, arr_bytes, arr_bytes_floats
+
+
+def test_arr_str():
+    np.testing.assert_array_equal(arr_str('+2.3E+00,+5.4E+00,+9.9E+00\n'), [2.3, 5.4, 9.9])
+    np.testing.assert_array_equal(arr_str('7'), [7.0])
+
+
+def test_arr_bytes():
+    ret = arr_bytes(b'1,0\r')
+    np.testing.assert_array_equal(ret, [1, 0])
+    assert ret.dtype.kind == 'i'
+    with pytest.raises(ValueError):
+        arr_bytes(b'1,2.5\r')
+
+
+def test_arr_bytes_floats():
+    """ trailing commas, carriage returns and empty fields are skipped """
+    np.testing.assert_array_equal(arr_bytes_floats(b'-3.051776e-004,-3.051776e-004,\r'),
+                                  [-3.051776e-4, -3.051776e-4])
+    np.testing.assert_array_equal(arr_bytes_floats(b'1.0,,2.0, ,3.0,\r\n'), [1.0, 2.0, 3.0])
+    assert arr_bytes_floats(b'\r').size == 0
+
+
+def test_out_buffer():
+    out = np.zeros(8)
+    ret = arr_bytes_floats(b'1.5,2.5,3.5,\r', out=out)
+    np.testing.assert_array_equal(ret, [1.5, 2.5, 3.5])
+    assert ret.base is out
+    with pytest.raises(ValueError):
+        arr_str('1,2,3', out=np.zeros(2))
+
+
+def test_ieee_block():
+    from instrbuilder.scpi import ieee_block, convert_return
+    data = np.arange(5, dtype='>f4')
+    block = b'#220' + data.tobytes() + b'\n'
+    ret = convert_return['ieee_block_f32'](block)
+    np.testing.assert_array_equal(ret, data)
+    assert np.shares_memory(ret, np.frombuffer(block, dtype='u1'))  # no copy
+    np.testing.assert_array_equal(ieee_block(b'#0' + data.astype('<i2').tobytes() + b'\n', '<i2'),
+                                  [0, 1, 2, 3, 4])
+    with pytest.raises(ValueError):
+        ieee_block(b'#220' + data.tobytes()[:8])  # truncated
+
+
+def test_binary_getter():
+    """ get reads a binary getter with read_raw """
+    from instrbuilder.command import Command
+    from instrbuilder.scpi import SCPI, convert_return
+
+    data = np.linspace(0, 1, 11)
+    block = b'#288' + data.astype('<f8').tobytes() + b'\n'
+
+    class Comm(object):
+        def write(self, cmd_str):
+            self.sent = cmd_str
+
+        def query(self, cmd_str):
+            return 'fake'
+
+        def read_raw(self):
+            return block
+
+    cmds = [Command(name='id', ascii_str='*IDN', ascii_str_get='*IDN?', setter=False, getter_type=str),
+            Command(name='upload', ascii_str='MMEM:UPL', ascii_str_get='MMEM:UPL? "{filename}"', setter=False,
+                    getter_type=convert_return['ieee_block_f64_le'])]
+    comm = Comm()
+    instr = SCPI(cmds, comm)
+    np.testing.assert_array_equal(instr.get('upload', configs={'filename': 'a.dat'}), data)
+    assert comm.sent == 'MMEM:UPL? "a.dat"'
+
+
+def test_serial_read_raw():
+    """ a binary block is read in full even when the data includes the eol """
+    import io
+    from instrbuilder.scpi import Serial
+
+    block = b'#14\r\n\r\n'
+    serial = Serial.__new__(Serial)
+    serial.eol = b'\n'
+    serial.ser = io.BytesIO(block + b'\n' + b'1.5\n')
+    assert serial.read_raw() == block + b'\n'
+    assert serial.read_raw() == b'1.5\n'
+
+
+def test_bit_getters():
+    """ each bit{i}_set / bit{i}_cleared conversion tests its own bit """
+    from instrbuilder.scpi import convert_return
+    for i in range(8):
+        assert convert_return['bit{}_set'.format(i)](str(1 << i)) is True
+        assert convert_return['bit{}_set'.format(i)](str(0xFF ^ (1 << i))) is False
+        assert convert_return['bit{}_cleared'.format(i)](str(0xFF ^ (1 << i))) is True
+    assert convert_return['bit3_set']('8') and not convert_return['bit3_set']('128')
@@ -0,0 +1,52 @@
+import threading
+import pytest
+from instrbuilder.rack import Rack, RackError
+from .conftest import FakeComm
+
+
+def test_rack_get_set(open_unconnected):
+    rack = Rack({name: open_unconnected('tester', FakeComm()) for name in ('osc1', 'osc2')})
+    rack['osc2'].enable_cache()  # remembers the value of each channel
+    rack.set({'osc1': {'time_range': 0.1},
+              'osc2': [('trigger_level', 0.5, {'chan': 2}), ('trigger_level', 0.25, {'chan': 1})]})
+    values = rack.get({'osc1': ['time_range'],
+                       'osc2': [('trigger_level', {'chan': 2}), ('trigger_level', {'chan': 1})]})
+    assert values == {'osc1': [0.1], 'osc2': [0.5, 0.25]}
+    assert set(rack.timing) == {'osc1', 'osc2', 'total'}
+    rack.close()
+
+
+def test_rack_error(open_unconnected):
+    """ an instrument that raises does not lose the results of the others """
+    rack = Rack({name: open_unconnected('tester', FakeComm()) for name in ('osc1', 'osc2')})
+
+    def fail(instr):
+        raise IOError('timeout')
+    with pytest.raises(RackError) as err:
+        rack.run({'osc1': lambda instr: instr.set('time_range', 0.2) or 'ok', 'osc2': fail})
+    assert err.value.results == {'osc1': 'ok'}
+    assert isinstance(err.value.errors['osc2'], IOError)
+    assert set(rack.timing) == {'osc1', 'total'}
+    rack.close()
+
+
+def test_rack_timing_per_thread(open_unconnected):
+    rack = Rack({name: open_unconnected('tester', FakeComm()) for name in ('osc1', 'osc2')})
+    thread = threading.Thread(target=rack.get, args=({'osc2': ['time_range']},))
+    rack.get({'osc1': ['time_range']})
+    thread.start()
+    thread.join()
+    assert set(rack.timing) == {'osc1', 'total'}
+    rack.close()
+
+
+def test_rack_parallel(open_unconnected):
+    """ the instruments are read at the same time (each read waits for all 4 to be in progress) """
+    barrier = threading.Barrier(4)
+
+    def read(instr):
+        barrier.wait(timeout=5)
+        return instr.get('time_range')
+    rack = Rack({'osc{}'.format(i): open_unconnected('tester', FakeComm()) for i in range(4)})
+    assert len(set(rack.run({name: read for name in rack}).values())) == 1
+    rack.close()
@@ -0,0 +1,53 @@
+import os
+import json
+import csv
+import instrbuilder
+from instrbuilder.instrument_opening import open_by_address
+
+instrument_cmds = os.path.join(os.path.dirname(instrbuilder.__file__), 'instruments')
+addr = {'no_interface': 'no_address'}
+
+osc = open_by_address(addr=addr, csv_dir=instrument_cmds,
+                      csv_folder='tester', instr_class='TestInstrument')
+
+
+def test_stats(tmpdir):
+    assert osc.stats() is None
+    osc.set('time_range', 0.1)
+    osc.enable_stats()
+    for i in range(3):
+        osc.set('time_range', 0.1)
+        osc.get('time_range')
+    osc.get('trigger_slope')  # has a lookup table
+
+    summ = osc.stats().summary()
+    assert summ['time_range']['total']['count'] == 6
+    assert summ['time_range']['transport']['count'] == 6
+    assert summ['time_range']['convert']['count'] == 3
+    assert sum(summ['trigger_slope']['lookup']['hist']) == 1
+    assert osc.stats().slowest(1)[0][0] in summ
+
+    osc.stats().dump(str(tmpdir.join('stats.json')))
+    with open(str(tmpdir.join('stats.json'))) as fp:
+        assert json.load(fp)['commands']['time_range']['total']['count'] == 6
+    osc.stats().dump(str(tmpdir.join('stats.csv')))
+    with open(str(tmpdir.join('stats.csv'))) as fp:
+        rows = list(csv.DictReader(fp))
+    assert {(r['name'], r['phase']) for r in rows} >= {('time_range', 'format'), ('trigger_slope', 'lookup')}
+
+    # disabled: nothing recorded, counts are kept
+    osc.enable_stats(False)
+    osc.get('time_range')
+    assert osc.stats().summary()['time_range']['total']['count'] == 6
+
+
+def test_stats_get_many():
+    osc.enable_stats()
+    osc.stats().reset()
+    osc.get_many(['time_range', 'trigger_slope'])
+    summ = osc.stats().summary()
+    for name in ('time_range', 'trigger_slope'):
+        assert summ[name]['transport']['count'] == 1
+        assert summ[name]['total']['count'] == 1
+    assert summ['time_range']['transport']['total'] == summ['trigger_slope']['transport']['total']
+    osc.enable_stats(False)
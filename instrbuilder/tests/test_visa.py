@@ -0,0 +1,52 @@
+import pytest
+from instrbuilder import scpi
+from instrbuilder.scpi import PyVisaUSB, resource_manager, list_resources
+
+
+class FakeResourceManager(object):
+    """ a pyvisa ResourceManager with one instrument; counts the bus enumerations """
+    def __init__(self):
+        self.resources = ('USB0::0x0957::0x17A9::MY52160418::INSTR',)
+        self.num_lists = 0
+        self.opened = []
+
+    def list_resources(self, query='?*::INSTR'):
+        self.num_lists += 1
+        return self.resources
+
+    def open_resource(self, addr):
+        if addr not in self.resources:
+            raise ValueError('VI_ERROR_RSRC_NFOUND')
+        self.opened.append(addr)
+        return object()
+
+
+@pytest.fixture
+def fake_mgr(monkeypatch):
+    mgr = FakeResourceManager()
+    monkeypatch.setattr(scpi, '_resource_managers', {'': mgr})
+    monkeypatch.setattr(scpi, '_resource_listings', {})
+    return mgr
+
+
+def test_open_without_listing(fake_mgr):
+    for _ in range(5):
+        PyVisaUSB(fake_mgr.resources[0])
+    assert resource_manager() is fake_mgr
+    assert fake_mgr.opened == list(fake_mgr.resources) * 5
+    assert fake_mgr.num_lists == 0
+
+
+def test_open_failure_lists(fake_mgr, capsys):
+    instr = PyVisaUSB('USB0::0x1AB1::0x04CE::DS1ZA1234::INSTR')
+    assert not hasattr(instr, 'comm')
+    assert fake_mgr.num_lists == 1
+    assert 'was not found by the resource manager' in capsys.readouterr().err
+
+
+def test_list_resources_ttl(fake_mgr):
+    assert list_resources(ttl=60) == fake_mgr.resources
+    assert list_resources(ttl=60) == fake_mgr.resources
+    assert fake_mgr.num_lists == 1
+    list_resources(ttl=0)
+    assert fake_mgr.num_lists == 2
@@ -0,0 +1,128 @@
+import numpy as np
+import pytest
+from .conftest import FakeComm
+
+
+class ScopeComm(FakeComm):
+    """ fake oscilloscope: returns a preamble and a binary block of waveform data """
+
+    def __init__(self, preamble, data):
+        super(ScopeComm, self).__init__({':WAV:PRE?': preamble})
+        self.data = data
+
+    def read_raw(self):
+        return self.block(self.data)
+
+
+def test_keysight_waveform(open_unconnected):
+    data = np.arange(0, 65536, 64, dtype='<u2')
+    comm = ScopeComm('+1,+0,+1024,+1,+1.0E-06,-5.0E-04,+0,+1.0E-04,+2.0E-01,+32768\n', data)
+    osc = open_unconnected('keysight/oscilloscope/MSOX3000', comm, 'KeysightOscilloscope')
+
+    t, volts = osc.get_waveform(chan=2, fmt='WORD')
+    assert t.dtype == np.float32 and volts.dtype == np.float32
+    np.testing.assert_allclose(volts, (data - 32768.) * 1e-4 + 0.2, rtol=1e-6, atol=1e-6)
+    np.testing.assert_allclose(t, np.arange(1024) * 1e-6 - 5e-4, rtol=1e-6, atol=1e-9)
+    assert ':WAV:SOUR CHAN2' in comm.written[0] and ':WAV:BYT LSBF' in comm.written[0]
+
+    # the preamble and setup are kept
+    osc.get_waveform(chan=2, fmt='WORD')
+    assert comm.queries.count(':WAV:PRE?') == 1
+    assert comm.written.count(':WAV:DATA?') == 2 and len(comm.written) == 3
+    # until the timebase changes
+    osc.set('time_range', 1e-3)
+    osc.get_waveform(chan=2, fmt='WORD')
+    assert comm.queries.count(':WAV:PRE?') == 2
+
+
+def test_rigol_waveform(open_unconnected):
+    data = np.arange(256, dtype='u1')
+    comm = ScopeComm('0,0,256,1,2.0e-06,-1.0e-04,0,4.0e-02,-10,127\n', data)
+    osc = open_unconnected('rigol/oscilloscope/xs1000', comm, 'RigolOscilloscope')
+
+    t, volts = osc.get_waveform(chan=1)
+    np.testing.assert_allclose(volts, (data - (-10.) - 127.) * 0.04, rtol=1e-6, atol=1e-6)
+    np.testing.assert_allclose(t, np.arange(256) * 2e-6 - 1e-4, rtol=1e-6, atol=1e-9)
+
+
+def test_rigol_waveform_source(open_unconnected):
+    # the scope answers the source as CHAN<n>; the lookup table maps it back to the channel number
+    comm = FakeComm({':WAV:SOUR?': 'CHAN3'})
+    osc = open_unconnected('rigol/oscilloscope/xs1000', comm, 'RigolOscilloscope')
+    assert osc.get('waveform_source') == 3
+    osc.enable_cache()
+    osc.set('waveform_source', 3)
+    assert comm.written[-1] == ':WAV:SOUR CHAN3'
+    assert osc.get('waveform_source') == 3  # from the cache
+    assert comm.queries.count(':WAV:SOUR?') == 1
+
+
+class SegmentComm(FakeComm):
+    """ fake scope with segmented memory: the data of segment i, channel c is i + 10 * c """
+
+    def __init__(self, preamble, points):
+        super(SegmentComm, self).__init__({':WAV:PRE?': preamble, '*OPC?': '1'})
+        self.points = points
+        self.segment = 1
+        self.source = 1
+        self.running_polls = 0
+
+    def _parse(self, cmd_str):
+        for part in cmd_str.split(';'):
+            if part.startswith(':WAV:SOUR CHAN'):
+                self.source = int(part[-1])
+            if part.startswith(':ACQ:SEGM:IND '):
+                self.segment = int(part.split(' ')[1])
+
+    def write(self, cmd_str):
+        super(SegmentComm, self).write(cmd_str)
+        self._parse(cmd_str)
+
+    def query(self, cmd_str):
+        ret = super(SegmentComm, self).query(cmd_str)
+        self._parse(cmd_str)
+        if cmd_str.endswith(':WAV:SEGM:TTAG?'):
+            return '{:E}'.format((self.segment - 1) * 1e-3)
+        if cmd_str == ':OPER:COND?':
+            # bit 3 (running) is set for the first running_polls reads
+            self.running_polls -= 1
+            return '8' if self.running_polls >= 0 else '0'
+        return ret
+
+    def read_raw(self):
+        return self.block(np.full(self.points, self.segment + 10 * self.source, dtype='u1'))
+
+
+def test_acquire_segments(open_unconnected):
+    comm = SegmentComm('+0,+0,+100,+1,+1.0E-06,+0.0E+00,+0,+1.0E+00,+0.0E+00,+0\n', points=100)
+    osc = open_unconnected('keysight/oscilloscope/MSOX3000', comm, 'KeysightMSOX3000')
+
+    t, volts, tags = osc.acquire_segments(5, channels=[1, 3])
+    assert volts.shape == (5, 2, 100) and volts.dtype == np.float32
+    np.testing.assert_array_equal(volts[:, 0, 0], [11, 12, 13, 14, 15])
+    np.testing.assert_array_equal(volts[:, 1, 0], [31, 32, 33, 34, 35])
+    np.testing.assert_allclose(tags, np.arange(5) * 1e-3)
+    np.testing.assert_allclose(t, np.arange(100) * 1e-6, atol=1e-9)
+    assert ':ACQ:MODE SEGM;:ACQ:SEGM:COUN 5' in comm.written
+
+    t, volts, tags = osc.acquire_segments(3, channels=2)
+    assert volts.shape == (3, 100)
+    np.testing.assert_array_equal(volts[:, 0], [21, 22, 23])
+    t, volts, tags = osc.acquire_segments(3, channels=[2])  # a list keeps the channel axis
+    assert volts.shape == (3, 1, 100)
+
+
+def test_acquire_segments_waits(open_unconnected):
+    """ the segments are read only after the running bit (OPER:COND bit 3) clears """
+    comm = SegmentComm('+0,+0,+100,+1,+1.0E-06,+0.0E+00,+0,+1.0E+00,+0.0E+00,+0\n', points=100)
+    osc = open_unconnected('keysight/oscilloscope/MSOX3000', comm, 'KeysightMSOX3000')
+    comm.running_polls = 3
+    comm.queries = []
+    osc.acquire_segments(2, channels=1, poll=0.001)
+    conds = [i for i, q in enumerate(comm.queries) if q == ':OPER:COND?']
+    assert len(conds) == 4
+    first_segment = next(i for i, q in enumerate(comm.queries) if ':ACQ:SEGM:IND' in q)
+    assert first_segment > conds[-1]
+
+    with pytest.raises(ValueError):
+        osc.acquire_segments(1)  # :ACQ:SEGM:COUN is at least 2
@@ -52,6 +52,9 @@ setuptools.setup(
     include_package_data=True,
     install_requires=required,
     dependency_links=dependency_links,
+    entry_points={
+        'console_scripts': ['instrbuilder=instrbuilder.cli:main'],
+    },
     classifiers=[
         "Programming Language :: Python :: 3",
         "License :: OSI Approved :: MIT License",